@@ -0,0 +1,119 @@
+import numpy as np
+
+from game_logic import OthelloGame, BLACK, WHITE
+
+# Codificação das casas nos arrays (N, 8, 8) int8: os mesmos códigos de cor de game_logic
+EMPTY = 0
+
+_INNER_COLS = np.uint64(0x7E7E7E7E7E7E7E7E)
+_FULL_MASK = np.uint64(0xFFFFFFFFFFFFFFFF)
+_ZERO = np.uint64(0)
+_ONE = np.uint64(1)
+
+# Direções como (deslocamento, máscara), as mesmas de game_logic
+_DIRECTIONS = (
+    (1, _INNER_COLS),
+    (-1, _INNER_COLS),
+    (8, _FULL_MASK),
+    (-8, _FULL_MASK),
+    (9, _INNER_COLS),
+    (7, _INNER_COLS),
+    (-7, _INNER_COLS),
+    (-9, _INNER_COLS),
+)
+
+
+def _shift(x, shift):
+    # Em uint64 os bits que saem do tabuleiro são descartados pelo próprio NumPy
+    if shift > 0:
+        return np.left_shift(x, np.uint64(shift))
+    return np.right_shift(x, np.uint64(-shift))
+
+
+def boards_to_bitboards(boards):
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 64)
+    black = np.packbits(boards == BLACK, axis=1, bitorder="little")
+    white = np.packbits(boards == WHITE, axis=1, bitorder="little")
+    return (np.ascontiguousarray(black).view("<u8").ravel(),
+            np.ascontiguousarray(white).view("<u8").ravel())
+
+
+def bitboards_to_boards(black, white):
+    black = np.asarray(black, dtype="<u8").reshape(-1, 1)
+    white = np.asarray(white, dtype="<u8").reshape(-1, 1)
+    black_bits = np.unpackbits(black.view(np.uint8), axis=1, bitorder="little")
+    white_bits = np.unpackbits(white.view(np.uint8), axis=1, bitorder="little")
+    boards = black_bits.astype(np.int8) * BLACK + white_bits.astype(np.int8) * WHITE
+    return boards.reshape(-1, 8, 8)
+
+
+def games_to_bitboards(games):
+    black = np.fromiter((game.black for game in games), dtype=np.uint64)
+    white = np.fromiter((game.white for game in games), dtype=np.uint64)
+    return black, white
+
+
+def bitboards_to_games(black, white, turn=BLACK):
+    return [OthelloGame.from_bitboards(int(b), int(w), turn) for b, w in zip(black, white)]
+
+
+def popcount(x):
+    x = np.asarray(x, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int64)
+    return np.unpackbits(x.reshape(-1, 1).view(np.uint8), axis=1).sum(axis=1).reshape(x.shape)
+
+
+# Jogadas legais de `own` contra `opp` para todos os tabuleiros de uma vez
+def valid_moves_mask(own, opp):
+    own = np.asarray(own, dtype=np.uint64)
+    opp = np.asarray(opp, dtype=np.uint64)
+    empty = ~(own | opp)
+    moves = np.zeros_like(own)
+    for shift, mask in _DIRECTIONS:
+        o = opp & mask
+        t = o & _shift(own, shift)
+        for _ in range(5):
+            t |= o & _shift(t, shift)
+        moves |= empty & _shift(t, shift)
+    return moves
+
+
+# Peças viradas por jogadas em `squares` (-1 quando o tabuleiro não joga)
+def flips_mask(own, opp, squares):
+    own = np.asarray(own, dtype=np.uint64)
+    opp = np.asarray(opp, dtype=np.uint64)
+    squares = np.asarray(squares)
+    playing = squares >= 0
+    move = np.where(playing, np.left_shift(_ONE, np.where(playing, squares, 0).astype(np.uint64)), _ZERO)
+    flips = np.zeros_like(own)
+    for shift, mask in _DIRECTIONS:
+        o = opp & mask
+        x = o & _shift(move, shift)
+        line = x
+        for _ in range(5):
+            x = o & _shift(x, shift)
+            line |= x
+        # Casa logo depois da sequência de peças adversárias
+        beyond = _shift(line, shift) & ~line
+        flips |= np.where((beyond & own) != 0, line, _ZERO)
+    return flips
+
+
+# Aplica as jogadas e devolve os novos (own, opp) e as peças viradas
+def apply_moves(own, opp, squares):
+    own = np.asarray(own, dtype=np.uint64)
+    opp = np.asarray(opp, dtype=np.uint64)
+    squares = np.asarray(squares)
+    flips = flips_mask(own, opp, squares)
+    playing = (squares >= 0) & (flips != 0)
+    move = np.where(playing, np.left_shift(_ONE, np.where(playing, squares, 0).astype(np.uint64)), _ZERO)
+    return own | flips | move, opp & ~flips, flips
+
+
+def get_scores(black, white):
+    return popcount(black), popcount(white)
+
+
+def mobility(own, opp):
+    return popcount(valid_moves_mask(own, opp))
@@ -0,0 +1,215 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from game_logic import OthelloGame
+
+# Posições usadas no perft: sequência de jogadas a partir da posição inicial
+# (passes são implícitos) e a contagem de folhas esperada por profundidade
+PERFT_POSITIONS = {
+    "start": ("", [4, 12, 56, 244, 1396, 8200, 55092]),
+    "ply12": ("e6f4g3d6e3f6c7d7g7g4e7g2", [7, 65, 540, 5555, 51816]),
+    "ply24": ("e6d6c6d7e8b6c5f6a7d8e3f3g7b4e7c4c8g6a3f5g5h7b3g8", [12, 127, 1452, 15411, 174787]),
+    "ply36": ("c4e3f5c6d3e6c5c3f3f6b5d6b3b6f7e2f4b2e1g7b1a3d7b4h8g8e7g3a6c1f2c7b7f8c2g1",
+              [14, 163, 2102, 23807, 287581]),
+}
+
+# Métricas de vazão comparadas com a linha de base (maior é melhor)
+THROUGHPUT_METRICS = (
+    "get_valid_moves_per_sec",
+    "make_move_per_sec",
+    "get_score_per_sec",
+    "playouts_per_sec",
+    "perft_nodes_per_sec",
+)
+
+
+def parse_moves(sequence):
+    return [(int(sequence[i + 1]) - 1, ord(sequence[i]) - ord("a")) for i in range(0, len(sequence), 2)]
+
+
+def position_from_moves(sequence):
+    game = OthelloGame()
+    for row, col in parse_moves(sequence):
+        if not game.make_move(row, col, game.turn):
+            raise ValueError(f"Jogada inválida na sequência: {sequence}")
+    return game
+
+
+# Conta as folhas até `depth`; um passe conta como uma jogada e fim de jogo é folha
+def perft(game, depth, color):
+    if depth == 0:
+        return 1
+    moves = game.get_valid_moves_mask(color)
+    if not moves:
+        if not game.has_moves(-color):
+            return 1
+        return perft(game, depth - 1, -color)
+
+    nodes = 0
+    while moves:
+        low = moves & -moves
+        moves ^= low
+        game.push_move(low.bit_length() - 1, color)
+        nodes += perft(game, depth - 1, -color)
+        game.pop_move()
+    return nodes
+
+
+def random_game(rng):
+    game = OthelloGame()
+    moves = []
+    while game.turn is not None:
+        row, col = rng.choice(game.get_valid_moves(game.turn))
+        moves.append((row, col, game.turn))
+        game.make_move(row, col, game.turn)
+    return game, moves
+
+
+# Executa `func` até completar pelo menos `min_time` segundos e retorna operações por segundo
+def measure(func, ops_per_call, min_time):
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls * ops_per_call / elapsed
+
+
+def run_perft(depth):
+    results = {}
+    failures = []
+    total_nodes = 0
+    total_time = 0.0
+    for name, (sequence, expected) in PERFT_POSITIONS.items():
+        game = position_from_moves(sequence)
+        counts = []
+        start = time.perf_counter()
+        for d in range(1, depth + 1):
+            counts.append(perft(game, d, game.turn))
+        elapsed = time.perf_counter() - start
+        total_nodes += sum(counts)
+        total_time += elapsed
+        results[name] = {"counts": counts, "seconds": elapsed}
+        if expected is not None and counts != expected[:len(counts)]:
+            failures.append(f"perft {name}: esperado {expected[:len(counts)]}, obtido {counts}")
+    return results, total_nodes / total_time, failures
+
+
+def run_benchmarks(depth=5, min_time=1.0, seed=1234):
+    rng = random.Random(seed)
+    games = [random_game(rng) for _ in range(50)]
+
+    # Posições de todas as fases da partida
+    positions = []
+    for _, moves in games:
+        game = OthelloGame()
+        for row, col, color in moves:
+            game.make_move(row, col, color)
+            if game.turn is not None:
+                positions.append(OthelloGame.from_bitboards(game.black, game.white, game.turn))
+    positions = positions[::7]
+
+    def valid_moves():
+        for game in positions:
+            game.get_valid_moves(game.turn)
+
+    def make_moves():
+        for _, moves in games:
+            game = OthelloGame()
+            for row, col, color in moves:
+                game.make_move(row, col, color)
+
+    def scores():
+        for game in positions:
+            game.get_score()
+
+    playout_rng = random.Random(seed)
+
+    def playout():
+        random_game(playout_rng)
+
+    total_moves = sum(len(moves) for _, moves in games)
+    perft_results, perft_rate, failures = run_perft(depth)
+    results = {
+        "get_valid_moves_per_sec": measure(valid_moves, len(positions), min_time),
+        "make_move_per_sec": measure(make_moves, total_moves, min_time),
+        "get_score_per_sec": measure(scores, len(positions), min_time),
+        "playouts_per_sec": measure(playout, 1, min_time),
+        "perft_nodes_per_sec": perft_rate,
+        "perft": perft_results,
+        "perft_depth": depth,
+    }
+    return results, failures
+
+
+def compare_with_baseline(results, baseline, threshold):
+    failures = []
+    for metric in THROUGHPUT_METRICS:
+        if metric not in baseline:
+            continue
+        minimum = baseline[metric] * (1 - threshold)
+        if results[metric] < minimum:
+            failures.append(
+                f"{metric}: {results[metric]:.0f} abaixo do mínimo {minimum:.0f} "
+                f"(linha de base {baseline[metric]:.0f}, tolerância {threshold:.0%})"
+            )
+    for name, data in baseline.get("perft", {}).items():
+        current = results["perft"].get(name)
+        if current is None:
+            continue
+        size = min(len(current["counts"]), len(data["counts"]))
+        if current["counts"][:size] != data["counts"][:size]:
+            failures.append(f"perft {name}: contagens diferentes da linha de base")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do motor de Othello")
+    parser.add_argument("--depth", type=int, default=5, help="Profundidade do perft")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Segundos mínimos por medição")
+    parser.add_argument("--output", default="benchmark_results.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="Arquivo JSON da linha de base")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Queda de vazão tolerada em relação à linha de base (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Grava os resultados como nova linha de base")
+    args = parser.parse_args(argv)
+
+    results, failures = run_benchmarks(depth=args.depth, min_time=args.min_time)
+    results["python"] = platform.python_version()
+    results["machine"] = platform.machine()
+    results["timestamp"] = time.time()
+
+    for metric in THROUGHPUT_METRICS:
+        print(f"{metric:>26}: {results[metric]:>12,.0f}")
+    for name, data in results["perft"].items():
+        print(f"{'perft ' + name:>26}: {data['counts']} ({data['seconds']:.2f}s)")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Linha de base gravada em {args.baseline}")
+    else:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            failures += compare_with_baseline(results, baseline, args.threshold)
+        except FileNotFoundError:
+            print(f"Linha de base {args.baseline} não encontrada; apenas gravando resultados")
+
+    results["failures"] = failures
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for failure in failures:
+        print(f"[FALHA] {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
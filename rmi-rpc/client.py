@@ -3,6 +3,7 @@ from tkinter import messagebox
 import Pyro4
 import threading
 from connection_dialog import ConnectionDialog
+from game_logic import board_rows
 import time
 from tkinter import ttk
 
@@ -21,7 +22,7 @@ class OthelloClient:
         self.current_turn = "black"
         self.game_active = False
         self.player_name = None
-        self.game_id = "game1"
+        self.game_id = None  # Definido pelo servidor no pareamento
         
         self.board = [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
         
@@ -104,6 +105,9 @@ class OthelloClient:
         # Thread para atualização do jogo
         self.update_thread = None
         self.running = True
+        self.cursor = 0  # Posição no registro de eventos do jogo
+        # O tabuleiro chega como [pretas, brancas]: bem menor que as 8 listas
+        self.board_format = "bitboards"
         
     def init_board(self):
         # Desenhar as bordas de madeira
@@ -199,11 +203,8 @@ class OthelloClient:
             try:
                 response = self.server.make_move(self.game_id, self.player_name, row, col)
                 
-                if response["status"] == "success":
-                    self.handle_remote_move(response)
-                elif response["status"] == "game_over":
-                    self.handle_game_over(response)
-                elif response["status"] == "error":
+                # A jogada aceita chega pelos eventos, como a do adversário
+                if response["status"] == "error":
                     messagebox.showerror("Erro", response["message"])
                     
             except Exception as e:
@@ -292,7 +293,8 @@ class OthelloClient:
         
         self.root.title(status)
     
-    def connect_to_server(self, host='localhost', port=5000, player_name=""):
+    # Sem game_id o servidor coloca o jogador na fila de pareamento
+    def connect_to_server(self, host='localhost', port=5000, player_name="", vs_bot=False, game_id=None):
         try:
             uri = f"PYRO:othello.server@{host}:{port}"
             self.server = Pyro4.Proxy(uri)
@@ -301,10 +303,16 @@ class OthelloClient:
             self.port = port
             
             # Tenta conectar ao jogo
-            response = self.server.connect_player(player_name, self.game_id)
+            if game_id or vs_bot:
+                response = self.server.connect_player(player_name, game_id or "game1", vs_bot,
+                                                      self.board_format)
+            else:
+                response = self.server.find_match(player_name, board_format=self.board_format)
             
             if response["status"] == "connected":
                 self.my_color = response["color"]
+                self.game_id = response.get("game_id", self.game_id)
+                self.cursor = response.get("cursor", 0)
                 self.game_active = response["game_started"]
                 self.update_status()
                 
@@ -324,78 +332,89 @@ class OthelloClient:
             messagebox.showerror("Erro", f"Não foi possível conectar ao servidor: {e}")
             return False
     
+    # Recebe os eventos do jogo por long-poll: o servidor só responde quando algo
+    # acontece, ou depois de um tempo sem novidades
     def update_game_state(self):
-        while self.running:
-            try:
-                response = self.server.get_game_state(self.game_id, self.player_name)
-                
-                if response["status"] == "success":
-                    if response["type"] == "surrender_request":
-                        # Para a thread temporariamente
-                        self.running = False
-                        # Mostra o diálogo de desistência
-                        requester = response["requester"]
-                        self.root.after(0, lambda: self.handle_surrender_request(requester))
-                        break
+        # Conexão própria: a chamada fica parada no servidor e não pode atrasar
+        # as jogadas e mensagens enviadas pela interface. Ela é fechada quando o
+        # laço termina, liberando a thread que o servidor reserva para ela
+        with Pyro4.Proxy(self.server._pyroUri) as events_server:
+            while self.running:
+                try:
+                    response = events_server.wait_for_events(self.game_id, self.player_name, self.cursor)
+                    if response["status"] != "success":
+                        time.sleep(1)
+                        continue
                     
-                    elif response["type"] == "surrender_cancelled":
-                        print(self.player_name)
-                        print(response.get("requester"))
-                        print("aaaaaaaaaaaaaaaaaaaaaa")
-                        # Mostra mensagem para quem pediu a desistência
-                        if self.player_name == response.get("requester"):
-                            messagebox.showinfo("Desistência Recusada", 
-                                "Sua solicitação de desistência foi recusada. O jogo continua!")
-                            self.running = True
-                            self.update_thread = threading.Thread(target=self.update_game_state, daemon=True)
-                            self.update_thread.start()
-                            break
+                    if response.get("resync"):
+                        self.root.after(0, self.sync_state)
                     
-                    elif response["type"] == "game_over_surrender":
-                        # Caso especial para fim de jogo por desistência
-                        surrendered_by = response["surrendered_by"]
-                        winner = response["winner"]
-                        message = f"Fim de jogo! {surrendered_by} desistiu. {winner} vence!"
-                        self.running = False
-                        messagebox.showinfo("Fim de Jogo", message)
-                        self.root.quit()
-                        break
+                    first = response["cursor"] - len(response["events"])
+                    self.cursor = first
+                    for event in response["events"]:
+                        self.cursor += 1
+                        if not self.handle_event(event):
+                            return
+                    self.cursor = response["cursor"]
                     
-                    elif response["type"] == "game_started":
-                        self.game_active = True
-                        messagebox.showinfo("Jogo Iniciado", "O jogo começou!")
-                    elif response["type"] == "game_state":
-                        self.update_board_from_state(response["board"])
-                        self.current_turn = response["current_turn"]
-                        self.update_status()
-                        
-                        # Processa mensagens de chat não lidas
-                        if "chat_messages" in response:
-                            for msg in response["chat_messages"]:
-                                self.display_message(msg["color"], msg["player_name"], msg["message"])
-                    elif response["type"] == "chat":
-                        self.display_message(response["color"], response["player_name"], response["message"])
-                    
-                    elif response["type"] == "no_valid_moves":
-                        self.current_turn = response["current_turn"]
-                        self.update_status()
-                        messagebox.showinfo("Sem movimentos", 
-                            f"Jogador {self.current_turn.capitalize()} não tem movimentos válidos. Passando a vez.")
-                    elif response["type"] == "game_over":
-                        # Primeiro atualiza o tabuleiro
-                        self.update_board_from_state(response["board"])
-                        self.update_status()
-                        # Depois mostra a mensagem de fim de jogo
-                        self.handle_game_over(response)
-                        break
-                    
-                time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"Erro na atualização do estado do jogo: {e}")
-                time.sleep(1)
+                except Exception as e:
+                    print(f"Erro na atualização do estado do jogo: {e}")
+                    time.sleep(1)
+    
+    # Trata um evento do jogo; retorna False quando o laço de eventos deve parar
+    def handle_event(self, event):
+        if event["type"] == "move":
+            self.root.after(0, lambda: self.handle_remote_move(event))
+        
+        elif event["type"] == "chat":
+            self.root.after(0, lambda: self.display_message(event["color"], event["player_name"], event["message"]))
+        
+        elif event["type"] == "game_started":
+            self.game_active = True
+            self.root.after(0, lambda: messagebox.showinfo("Jogo Iniciado", "O jogo começou!"))
+        
+        elif event["type"] == "surrender_request":
+            if event["requester"] != self.player_name:
+                # A resposta ao pedido retoma o laço de eventos
+                self.running = False
+                self.root.after(0, lambda: self.handle_surrender_request(event["requester"]))
+                return False
+        
+        elif event["type"] == "surrender_cancelled":
+            if event["requester"] == self.player_name:
+                self.root.after(0, lambda: messagebox.showinfo("Desistência Recusada",
+                    "Sua solicitação de desistência foi recusada. O jogo continua!"))
+        
+        elif event["type"] == "game_over_surrender":
+            self.running = False
+            message = f"Fim de jogo! {event['surrendered_by']} desistiu. {event['winner']} vence!"
+            self.root.after(0, lambda: self._show_surrender_result(message))
+            return False
+        
+        elif event["type"] == "game_over":
+            self.root.after(0, lambda: self.handle_game_over(event))
+            return False
+        return True
+    
+    def _show_surrender_result(self, message):
+        messagebox.showinfo("Fim de Jogo", message)
+        self.root.quit()
+    
+    # O servidor recomeçou o registro de eventos (ex.: foi reiniciado):
+    # redesenha a partida a partir do estado completo
+    def sync_state(self):
+        try:
+            response = self.server.get_game_state(self.game_id, self.player_name)
+            if response["status"] == "success" and response["type"] == "game_state":
+                self.update_board_from_state(response["board"])
+                self.current_turn = response["current_turn"]
+                self.update_status()
+        except Exception as e:
+            print(f"Erro ao sincronizar o estado do jogo: {e}")
     
     def update_board_from_state(self, board_state):
+        if self.board_format == "bitboards":
+            board_state = board_rows(*board_state)
         for row in range(self.board_size):
             for col in range(self.board_size):
                 current_piece = board_state[row][col]
@@ -586,8 +605,9 @@ def main():
     connection_info = dialog.show()
     
     if connection_info:
-        host, port, player_name = connection_info
-        if client.connect_to_server(host=host, port=port, player_name=player_name):
+        host, port, player_name, vs_bot, game_id = connection_info
+        if client.connect_to_server(host=host, port=port, player_name=player_name, vs_bot=vs_bot,
+                                    game_id=game_id):
             client.root.mainloop()
     else:
         client.root.destroy()
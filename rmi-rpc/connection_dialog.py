@@ -9,7 +9,7 @@ class ConnectionDialog:
         
         # Define tamanho fixo da janela
         dialog_width = 300
-        dialog_height = 180
+        dialog_height = 240
         self.dialog.minsize(dialog_width, dialog_height)
         self.dialog.maxsize(dialog_width, dialog_height)
         
@@ -28,6 +28,8 @@ class ConnectionDialog:
         self.host = tk.StringVar(value="localhost")
         self.port = tk.StringVar(value="5000")
         self.player_name = tk.StringVar(value="")
+        self.game_id = tk.StringVar(value="")  # Vazio: o servidor escolhe o adversário
+        self.vs_bot = tk.BooleanVar(value=False)
         self.result = None
         
         # Frame principal com padding
@@ -47,13 +49,20 @@ class ConnectionDialog:
         entry_name = ttk.Entry(main_frame, textvariable=self.player_name, width=25)
         entry_name.grid(row=1, column=1, padx=(10,0), pady=(0,5))
         
-        ttk.Label(main_frame, text="Porta:").grid(row=2, column=0, sticky="w", pady=(0,15))
+        ttk.Label(main_frame, text="Porta:").grid(row=2, column=0, sticky="w", pady=(0,5))
         entry_port = ttk.Entry(main_frame, textvariable=self.port, width=25)
-        entry_port.grid(row=2, column=1, padx=(10,0), pady=(0,15))
+        entry_port.grid(row=2, column=1, padx=(10,0), pady=(0,5))
+        
+        ttk.Label(main_frame, text="Jogo (opcional):").grid(row=3, column=0, sticky="w", pady=(0,5))
+        entry_game = ttk.Entry(main_frame, textvariable=self.game_id, width=25)
+        entry_game.grid(row=3, column=1, padx=(10,0), pady=(0,5))
+        
+        ttk.Checkbutton(main_frame, text="Jogar contra o computador", 
+                        variable=self.vs_bot).grid(row=4, column=0, columnspan=2, sticky="w", pady=(0,15))
         
         # Frame para botões
         btn_frame = ttk.Frame(main_frame)
-        btn_frame.grid(row=3, column=0, columnspan=2)
+        btn_frame.grid(row=5, column=0, columnspan=2)
         
         # Botões com tamanhos definidos
         ttk.Button(btn_frame, text="Conectar", command=self.connect, width=15).pack(side=tk.LEFT, padx=5)
@@ -63,7 +72,8 @@ class ConnectionDialog:
         if not self.player_name.get().strip():
             messagebox.showerror("Erro", "Por favor, digite seu nome!")
             return
-        self.result = (self.host.get(), int(self.port.get()), self.player_name.get().strip())
+        self.result = (self.host.get(), int(self.port.get()), self.player_name.get().strip(), 
+                       self.vs_bot.get(), self.game_id.get().strip() or None)
         self.dialog.destroy()
     
     def cancel(self):
@@ -0,0 +1,183 @@
+import time
+
+from game_logic import OthelloGame, BLACK
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Pesos posicionais clássicos: cantos valem muito, casas vizinhas aos cantos são perigosas
+SQUARE_WEIGHTS = (
+    100, -20, 10,  5,  5, 10, -20, 100,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+     10,  -2,  1,  1,  1,  1,  -2,  10,
+      5,  -2,  1,  0,  0,  1,  -2,   5,
+      5,  -2,  1,  0,  0,  1,  -2,   5,
+     10,  -2,  1,  1,  1,  1,  -2,  10,
+    -20, -50, -2, -2, -2, -2, -50, -20,
+    100, -20, 10,  5,  5, 10, -20, 100,
+)
+
+# Casas agrupadas por peso, para avaliar o tabuleiro com contagens de bits
+WEIGHT_MASKS = tuple(
+    (weight, sum(1 << square for square in range(64) if SQUARE_WEIGHTS[square] == weight))
+    for weight in sorted(set(SQUARE_WEIGHTS))
+    if weight != 0
+)
+
+WIN_SCORE = 100000
+INFINITY = 10 * WIN_SCORE
+
+# Quantos nós entre cada verificação do relógio
+CLOCK_INTERVAL = 64
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class OthelloEngine:
+    def __init__(self, time_limit=1.0, max_depth=60, tt_bits=16):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_bits)
+        self.deadline = 0
+        self.nodes = 0
+        # Informações da última busca (profundidade completa, valor, nós, tempo)
+        self.last_search = {}
+
+    def choose_move(self, game, color=None):
+        if color is None:
+            color = game.turn
+        if color is None or not game.has_moves(color):
+            return None
+
+        # Busca sobre uma cópia, para não alterar o jogo compartilhado com o servidor
+        board = OthelloGame.from_bitboards(game.black, game.white, color)
+        moves = self.order_moves(board, color, None)
+        best_move = moves[0]
+        if len(moves) == 1:
+            self.last_search = {"depth": 0, "value": None, "nodes": 0, "time": 0.0}
+            return best_move >> 3, best_move & 7
+
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit
+        self.nodes = 0
+        self.tt.new_search()
+        best_value = None
+        completed_depth = 0
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, move = self.search_root(board, color, depth, best_move)
+            except SearchTimeout:
+                break
+            best_move, best_value, completed_depth = move, value, depth
+            # Resultado exato (fim de jogo) ou tempo quase esgotado: não vale a pena aprofundar
+            if abs(value) >= WIN_SCORE or depth >= 64 - (board.black | board.white).bit_count():
+                break
+            if time.perf_counter() - start > self.time_limit / 2:
+                break
+
+        self.last_search = {
+            "depth": completed_depth,
+            "value": best_value,
+            "nodes": self.nodes,
+            "time": time.perf_counter() - start
+        }
+        return best_move >> 3, best_move & 7
+
+    def search_root(self, board, color, depth, first_move):
+        alpha, beta = -INFINITY, INFINITY
+        best_move = first_move
+        for square in self.order_moves(board, color, first_move):
+            board.push_move(square, color)
+            value = self.child_value(board, color, depth - 1, alpha, beta)
+            board.pop_move()
+            if value > alpha:
+                alpha = value
+                best_move = square
+        self.tt.store(board.hash, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    # Valor da posição após a jogada de `color`, visto por `color`
+    def child_value(self, board, color, depth, alpha, beta):
+        next_color = board.turn
+        if next_color is None or next_color == color:
+            # Adversário passou (ou o jogo acabou): continua com o mesmo jogador
+            return self.negamax(board, color, depth, alpha, beta)
+        return -self.negamax(board, next_color, depth, -beta, -alpha)
+
+    def negamax(self, board, color, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if board.turn is None:
+            return self.final_score(board, color)
+        if depth <= 0:
+            return self.evaluate(board, color)
+
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.probe(board.hash)
+        if entry is not None:
+            tt_depth, tt_value, tt_bound, tt_move = entry
+            if tt_depth >= depth:
+                if tt_bound == EXACT:
+                    return tt_value
+                if tt_bound == LOWER and tt_value >= beta:
+                    return tt_value
+                if tt_bound == UPPER and tt_value <= alpha:
+                    return tt_value
+
+        best_value = -INFINITY
+        best_move = None
+        for square in self.order_moves(board, color, tt_move):
+            board.push_move(square, color)
+            value = self.child_value(board, color, depth - 1, alpha, beta)
+            board.pop_move()
+            if value > best_value:
+                best_value = value
+                best_move = square
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= alpha_orig:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(board.hash, depth, best_value, bound, best_move)
+        return best_value
+
+    # Jogada da tabela de transposição primeiro, depois as casas de maior peso
+    def order_moves(self, board, color, first_move):
+        moves = board.get_valid_moves_mask(color)
+        ordered = []
+        while moves:
+            low = moves & -moves
+            ordered.append(low.bit_length() - 1)
+            moves ^= low
+        ordered.sort(key=SQUARE_WEIGHTS.__getitem__, reverse=True)
+        if first_move is not None and first_move in ordered:
+            ordered.remove(first_move)
+            ordered.insert(0, first_move)
+        return ordered
+
+    def final_score(self, board, color):
+        black_count, white_count = board.get_score()
+        diff = black_count - white_count if color == BLACK else white_count - black_count
+        if diff > 0:
+            return WIN_SCORE + diff
+        if diff < 0:
+            return -WIN_SCORE + diff
+        return 0
+
+    def evaluate(self, board, color):
+        own, opp = (board.black, board.white) if color == BLACK else (board.white, board.black)
+        score = 0
+        for weight, mask in WEIGHT_MASKS:
+            score += weight * ((own & mask).bit_count() - (opp & mask).bit_count())
+        score += 5 * (board.mobility(color) - board.mobility(-color))
+        return score
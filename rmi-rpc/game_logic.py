@@ -1,123 +1,346 @@
+import random
+
+# Cores como inteiros pequenos (o adversário de `color` é `-color`);
+# os nomes "black"/"white" só aparecem nas mensagens do protocolo
+BLACK = 1
+WHITE = -1
+COLOR_NAMES = {BLACK: "black", WHITE: "white", None: None}
+COLOR_CODES = {"black": BLACK, "white": WHITE, None: None}
+
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+# Máscara sem as colunas A e H, evita que os deslocamentos "dobrem" de uma linha para outra
+INNER_COLS = 0x7E7E7E7E7E7E7E7E
+
+# Direções como (deslocamento de bits, máscara); casa = linha * 8 + coluna
+DIRECTIONS = (
+    (1, INNER_COLS),    # leste
+    (-1, INNER_COLS),   # oeste
+    (8, FULL_MASK),     # sul
+    (-8, FULL_MASK),    # norte
+    (9, INNER_COLS),    # sudeste
+    (7, INNER_COLS),    # sudoeste
+    (-7, INNER_COLS),   # nordeste
+    (-9, INNER_COLS),   # noroeste
+)
+
+# Chaves de Zobrist com semente fixa, para que o hash de uma posição seja
+# o mesmo em qualquer processo
+_zobrist_random = random.Random(0x0DE110)
+ZOBRIST_BLACK = tuple(_zobrist_random.getrandbits(64) for _ in range(64))
+ZOBRIST_WHITE = tuple(_zobrist_random.getrandbits(64) for _ in range(64))
+ZOBRIST_FLIP = tuple(b ^ w for b, w in zip(ZOBRIST_BLACK, ZOBRIST_WHITE))
+ZOBRIST_WHITE_TO_MOVE = _zobrist_random.getrandbits(64)
+
+# Casas (linha, coluna) de cada byte possível, por linha do tabuleiro
+ROW_SQUARES = [
+    [tuple((row, col) for col in range(8) if byte >> col & 1) for byte in range(256)]
+    for row in range(8)
+]
+
+
+# Bitboard das casas onde `own` pode jogar contra `opp`.
+# Cada bloco cobre uma direção e a sua oposta; `pairs` marca duas peças
+# adversárias seguidas e permite avançar duas casas por passo.
+def valid_moves_mask(own, opp):
+    inner = opp & INNER_COLS
+
+    # leste / oeste
+    pairs = inner & (inner << 1)
+    t = inner & (own << 1)
+    t |= inner & (t << 1)
+    t |= pairs & (t << 2)
+    t |= pairs & (t << 2)
+    moves = t << 1
+    pairs >>= 1
+    t = inner & (own >> 1)
+    t |= inner & (t >> 1)
+    t |= pairs & (t >> 2)
+    t |= pairs & (t >> 2)
+    moves |= t >> 1
+
+    # sul / norte
+    pairs = opp & (opp << 8)
+    t = opp & (own << 8)
+    t |= opp & (t << 8)
+    t |= pairs & (t << 16)
+    t |= pairs & (t << 16)
+    moves |= t << 8
+    pairs >>= 8
+    t = opp & (own >> 8)
+    t |= opp & (t >> 8)
+    t |= pairs & (t >> 16)
+    t |= pairs & (t >> 16)
+    moves |= t >> 8
+
+    # sudoeste / nordeste
+    pairs = inner & (inner << 7)
+    t = inner & (own << 7)
+    t |= inner & (t << 7)
+    t |= pairs & (t << 14)
+    t |= pairs & (t << 14)
+    moves |= t << 7
+    pairs >>= 7
+    t = inner & (own >> 7)
+    t |= inner & (t >> 7)
+    t |= pairs & (t >> 14)
+    t |= pairs & (t >> 14)
+    moves |= t >> 7
+
+    # sudeste / noroeste
+    pairs = inner & (inner << 9)
+    t = inner & (own << 9)
+    t |= inner & (t << 9)
+    t |= pairs & (t << 18)
+    t |= pairs & (t << 18)
+    moves |= t << 9
+    pairs >>= 9
+    t = inner & (own >> 9)
+    t |= inner & (t >> 9)
+    t |= pairs & (t >> 18)
+    t |= pairs & (t >> 18)
+    moves |= t >> 9
+
+    return moves & ~(own | opp) & FULL_MASK
+
+
+# Bitboard das peças de `opp` viradas por uma jogada de `own` em `square`
+def flips_mask(own, opp, square):
+    move = 1 << square
+    flips = 0
+    for shift, mask in DIRECTIONS:
+        o = opp & mask
+        line = 0
+        if shift > 0:
+            x = (move << shift) & FULL_MASK
+            while x & o:
+                line |= x
+                x = (x << shift) & FULL_MASK
+        else:
+            s = -shift
+            x = move >> s
+            while x & o:
+                line |= x
+                x >>= s
+        if x & own:
+            flips |= line
+    return flips
+
+
+# Converte um bitboard na lista de (linha, coluna), em ordem de linha
+def squares(mask):
+    result = []
+    row = 0
+    for byte in mask.to_bytes(8, "little"):
+        if byte:
+            result.extend(ROW_SQUARES[row][byte])
+        row += 1
+    return result
+
+
+# Visão legada do tabuleiro: lista de listas com "black", "white" ou None
+def board_rows(black, white):
+    board = []
+    for row in range(8):
+        line = []
+        for col in range(8):
+            bit = 1 << (row * 8 + col)
+            if black & bit:
+                line.append("black")
+            elif white & bit:
+                line.append("white")
+            else:
+                line.append(None)
+        board.append(line)
+    return board
+
+
+# Tabuleiro em 64 caracteres, linha a linha: "b" pretas, "w" brancas, "." vazia
+def board_string(black, white):
+    return "".join("b" if black >> square & 1 else "w" if white >> square & 1 else "."
+                   for square in range(64))
+
+
+def color_name(color):
+    return COLOR_NAMES[color]
+
+
+def color_code(name):
+    return COLOR_CODES[name]
+
+
+# Hash de Zobrist completo de uma posição; usado ao montar posições do zero
+def zobrist_hash(black, white, turn):
+    key = ZOBRIST_WHITE_TO_MOVE if turn == WHITE else 0
+    for square in range(64):
+        bit = 1 << square
+        if black & bit:
+            key ^= ZOBRIST_BLACK[square]
+        elif white & bit:
+            key ^= ZOBRIST_WHITE[square]
+    return key
+
+
 class OthelloGame:
+    __slots__ = ("board_size", "black", "white", "black_moves", "white_moves",
+                 "turn", "passed", "hash", "history")
+
     def __init__(self):
         self.board_size = 8
-        self.board = [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
-        self.turn = "black"
+        self.black = 0
+        self.white = 0
+        # Jogadas legais de cada cor, mantidas atualizadas a cada movimento
+        self.black_moves = 0
+        self.white_moves = 0
+        self.turn = BLACK
+        # True quando o adversário do último jogador precisou passar a vez
+        self.passed = False
+        # Hash de Zobrist da posição, incluindo o lado a jogar
+        self.hash = 0
+        # Pilha de desfazer: (casa, peças viradas, turno anterior, passe anterior,
+        # jogadas legais anteriores das pretas e das brancas, hash anterior)
+        self.history = []
         self.init_board()
-        
+
     def init_board(self):
         mid = self.board_size // 2
-        self.board[mid-1][mid-1] = "white"
-        self.board[mid][mid] = "white"
-        self.board[mid-1][mid] = "black"
-        self.board[mid][mid-1] = "black"
-    
+        self.white = (1 << ((mid - 1) * 8 + mid - 1)) | (1 << (mid * 8 + mid))
+        self.black = (1 << ((mid - 1) * 8 + mid)) | (1 << (mid * 8 + mid - 1))
+        self.update_moves()
+        self.hash = zobrist_hash(self.black, self.white, self.turn)
+
+    @classmethod
+    def from_bitboards(cls, black, white, turn=BLACK):
+        game = cls()
+        game.black = black
+        game.white = white
+        game.turn = turn
+        game.update_moves()
+        game.hash = zobrist_hash(black, white, turn)
+        return game
+
+    @property
+    def board(self):
+        return board_rows(self.black, self.white)
+
+    def _pieces(self, color):
+        if color == BLACK:
+            return self.black, self.white
+        return self.white, self.black
+
+    # Recalcula as jogadas legais das duas cores; chamado uma vez por movimento
+    def update_moves(self):
+        self.black_moves = valid_moves_mask(self.black, self.white)
+        self.white_moves = valid_moves_mask(self.white, self.black)
+
     def is_valid_move(self, row, col, color):
-        if self.board[row][col] is not None:
+        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
             return False
-        
-        opponent_color = "white" if color == "black" else "black"
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            found_opponent = False
-            
-            while 0 <= r < self.board_size and 0 <= c < self.board_size:
-                if self.board[r][c] is None:
-                    break
-                
-                if self.board[r][c] == opponent_color:
-                    found_opponent = True
-                elif self.board[r][c] == color and found_opponent:
-                    return True
-                else:
-                    break
-                
-                r += dr
-                c += dc
-        
-        return False
-    
+        return self.get_valid_moves_mask(color) >> (row * 8 + col) & 1 == 1
+
     def check_directions(self, row, col, color):
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        opponent_color = "white" if color == "black" else "black"
-        valid = False
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            found_opponent = False
-            temp_valid = False
-            
-            while 0 <= r < self.board_size and 0 <= c < self.board_size:
-                if self.board[r][c] is None:
-                    break
-                
-                current_color = self.board[r][c]
-                
-                if current_color == opponent_color:
-                    found_opponent = True
-                elif current_color == color and found_opponent:
-                    temp_valid = True
-                    break
-                else:
-                    break
-                
-                r += dr
-                c += dc
-            
-            if temp_valid:
-                valid = True
-                
-        return valid
-    
+        own, opp = self._pieces(color)
+        return flips_mask(own, opp, row * 8 + col) != 0
+
     def make_move(self, row, col, color):
-        if not self.is_valid_move(row, col, color):
+        if not (0 <= row < self.board_size and 0 <= col < self.board_size):
             return False
-        
-        self.board[row][col] = color
-        self.flip_pieces(row, col, color)
+        return self.push_move(row * 8 + col, color)
+
+    # Aplica a jogada em `square` (linha * 8 + coluna) e guarda o necessário
+    # para desfazê-la com pop_move, sem copiar o tabuleiro
+    def push_move(self, square, color=None):
+        if color is None:
+            color = self.turn
+        if color is None or not self.get_valid_moves_mask(color) >> square & 1:
+            return False
+        own, opp = self._pieces(color)
+        flips = flips_mask(own, opp, square)
+        self.history.append((square, flips, self.turn, self.passed,
+                             self.black_moves, self.white_moves, self.hash))
+
+        # Coloca a peça e vira as capturadas em uma única atualização
+        own |= flips | (1 << square)
+        opp &= ~flips
+        if color == BLACK:
+            self.black, self.white = own, opp
+            key = self.hash ^ ZOBRIST_BLACK[square]
+        else:
+            self.white, self.black = own, opp
+            key = self.hash ^ ZOBRIST_WHITE[square]
+        self.hash = self._hash_flips(key, flips)
+        self.update_moves()
+        self.update_turn(color)
         return True
-    
+
+    def pop_move(self):
+        square, flips, turn, passed, black_moves, white_moves, key = self.history.pop()
+        bit = 1 << square
+        if self.black & bit:
+            self.black ^= bit | flips
+            self.white |= flips
+        else:
+            self.white ^= bit | flips
+            self.black |= flips
+        self.turn = turn
+        self.passed = passed
+        self.black_moves = black_moves
+        self.white_moves = white_moves
+        self.hash = key
+        return square, flips
+
+    # Atualiza o hash com as peças que trocaram de cor
+    def _hash_flips(self, key, flips):
+        while flips:
+            low = flips & -flips
+            key ^= ZOBRIST_FLIP[low.bit_length() - 1]
+            flips ^= low
+        return key
+
+    # Define quem joga depois de `color`: o adversário, o próprio jogador
+    # se o adversário precisar passar, ou None se ninguém puder jogar
+    def update_turn(self, color):
+        if self.turn == WHITE:
+            self.hash ^= ZOBRIST_WHITE_TO_MOVE
+        self.passed = False
+        if self.has_moves(-color):
+            self.turn = -color
+        elif self.has_moves(color):
+            self.turn = color
+            self.passed = True
+        else:
+            self.turn = None
+        if self.turn == WHITE:
+            self.hash ^= ZOBRIST_WHITE_TO_MOVE
+
     def flip_pieces(self, row, col, color):
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        opponent_color = "white" if color == "black" else "black"
-        flipped_pieces = []
-        
-        for dr, dc in directions:
-            pieces_to_flip = []
-            r, c = row + dr, col + dc
-            
-            while 0 <= r < self.board_size and 0 <= c < self.board_size:
-                if self.board[r][c] is None:
-                    break
-                
-                current_color = self.board[r][c]
-                
-                if current_color == opponent_color:
-                    pieces_to_flip.append((r, c))
-                elif current_color == color and pieces_to_flip:
-                    flipped_pieces.extend(pieces_to_flip)
-                    for pr, pc in pieces_to_flip:
-                        self.board[pr][pc] = color
-                    break
-                else:
-                    break
-                
-                r += dr
-                c += dc
-                
-        return flipped_pieces
-    
+        own, opp = self._pieces(color)
+        flips = flips_mask(own, opp, row * 8 + col)
+        if color == BLACK:
+            self.black |= flips
+            self.white &= ~flips
+        else:
+            self.white |= flips
+            self.black &= ~flips
+        self.hash = self._hash_flips(self.hash, flips)
+        self.update_moves()
+        return squares(flips)
+
+    def get_valid_moves_mask(self, color):
+        if color == BLACK:
+            return self.black_moves
+        return self.white_moves
+
+    def has_moves(self, color):
+        return self.get_valid_moves_mask(color) != 0
+
+    def mobility(self, color):
+        return self.get_valid_moves_mask(color).bit_count()
+
+    def is_game_over(self):
+        return not (self.black_moves | self.white_moves)
+
     def get_valid_moves(self, color):
-        valid_moves = []
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if self.is_valid_move(row, col, color):
-                    valid_moves.append((row, col))
-        return valid_moves
-    
+        return squares(self.get_valid_moves_mask(color))
+
     def get_score(self):
-        black_count = sum(row.count("black") for row in self.board)
-        white_count = sum(row.count("white") for row in self.board)
-        return black_count, white_count
+        return self.black.bit_count(), self.white.bit_count()
@@ -0,0 +1,114 @@
+import itertools
+import threading
+import zlib
+
+DEFAULT_SHARDS = 16
+
+
+# Uma fatia do registro: parte dos jogos e do índice de conexões, com trava própria
+class RegistryShard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.games = {}
+        self.index = {}
+
+
+# Registro de jogos dividido em fatias pelo hash do game_id. Cada jogo tem sua
+# própria trava (game_data["lock"]), então jogadas em jogos diferentes nunca
+# disputam a mesma trava; as travas das fatias só protegem inclusões e remoções.
+# O índice conexão -> jogo permite tratar uma desconexão sem percorrer todos os jogos
+class GameRegistry:
+    def __init__(self, shards=DEFAULT_SHARDS):
+        self.shards = [RegistryShard() for _ in range(shards)]
+
+    def _shard(self, game_id):
+        # crc32 é estável entre processos, ao contrário de hash() para strings
+        return self.shards[zlib.crc32(str(game_id).encode()) % len(self.shards)]
+
+    def _index_shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    def get(self, game_id, default=None):
+        shard = self._shard(game_id)
+        with shard.lock:
+            return shard.games.get(game_id, default)
+
+    def __getitem__(self, game_id):
+        game_data = self.get(game_id)
+        if game_data is None:
+            raise KeyError(game_id)
+        return game_data
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+    def __len__(self):
+        return sum(len(shard.games) for shard in self.shards)
+
+    # Retorna o jogo existente ou cria um novo com factory(); a criação é atômica,
+    # então dois jogadores chegando juntos entram no mesmo jogo
+    def get_or_create(self, game_id, factory):
+        shard = self._shard(game_id)
+        with shard.lock:
+            game_data = shard.games.get(game_id)
+            if game_data is None:
+                game_data = factory()
+                game_data["lock"] = threading.RLock()
+                shard.games[game_id] = game_data
+            return game_data
+
+    # Substitui o jogo (ex.: reinício da partida) mantendo a mesma trava
+    def replace(self, game_id, game_data):
+        shard = self._shard(game_id)
+        with shard.lock:
+            previous = shard.games.get(game_id)
+            game_data["lock"] = previous["lock"] if previous else threading.RLock()
+            shard.games[game_id] = game_data
+            return game_data
+
+    def remove(self, game_id):
+        shard = self._shard(game_id)
+        with shard.lock:
+            return shard.games.pop(game_id, None)
+
+    # Cópia dos pares (game_id, jogo); cada fatia é lida sob a sua trava
+    def items(self):
+        items = []
+        for shard in self.shards:
+            with shard.lock:
+                items.extend(shard.games.items())
+        return items
+
+    def values(self):
+        return [game_data for _, game_data in self.items()]
+
+    # Página de jogos para listagem. A ordem é a das fatias e, dentro de cada uma,
+    # a de criação; fatias inteiras antes do offset são puladas pelo tamanho
+    def page(self, offset=0, limit=20):
+        items = []
+        total = 0
+        for shard in self.shards:
+            with shard.lock:
+                size = len(shard.games)
+                if offset >= total + size or len(items) >= limit:
+                    total += size
+                    continue
+                start = max(0, offset - total)
+                items.extend(itertools.islice(shard.games.items(), start, start + limit - len(items)))
+                total += size
+        return items, total
+
+    def bind(self, key, game_id):
+        shard = self._index_shard(key)
+        with shard.lock:
+            shard.index[key] = game_id
+
+    def unbind(self, key):
+        shard = self._index_shard(key)
+        with shard.lock:
+            return shard.index.pop(key, None)
+
+    def game_of(self, key):
+        shard = self._index_shard(key)
+        with shard.lock:
+            return shard.index.get(key)
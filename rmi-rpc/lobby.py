@@ -0,0 +1,83 @@
+import itertools
+import re
+import threading
+from collections import OrderedDict
+
+# Largura de cada faixa de rating; jogadores da mesma faixa se enfrentam
+DEFAULT_BUCKET_SIZE = 200
+
+
+# Fila de espera para partidas sem game_id combinado. Quem chega sem ter com
+# quem jogar recebe um jogo novo e fica esperando; o próximo da mesma faixa
+# entra nesse jogo. Cada faixa é um OrderedDict em ordem de chegada, então
+# parear (o mais antigo da faixa) e cancelar a espera são O(1)
+class Lobby:
+    def __init__(self, bucket_size=DEFAULT_BUCKET_SIZE, prefix="match"):
+        self.bucket_size = bucket_size
+        self.prefix = prefix
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.waiting = {}    # {faixa: OrderedDict(game_id -> None)}
+        self.bucket_of = {}  # {game_id: faixa} dos jogos esperando adversário
+
+    # Sem rating todos caem na mesma faixa
+    def bucket(self, rating):
+        if rating is None or not self.bucket_size:
+            return None
+        return int(rating) // self.bucket_size
+
+    # Retorna (game_id, pareado): pareado=False quando o jogador abriu um jogo novo
+    # e vai esperar o adversário nele
+    def assign(self, rating=None):
+        bucket = self.bucket(rating)
+        with self.lock:
+            queue = self.waiting.get(bucket)
+            if queue:
+                game_id, _ = queue.popitem(last=False)
+                del self.bucket_of[game_id]
+                if not queue:
+                    del self.waiting[bucket]
+                return game_id, True
+            game_id = f"{self.prefix}{next(self.counter)}"
+            self.waiting.setdefault(bucket, OrderedDict())[game_id] = None
+            self.bucket_of[game_id] = bucket
+            return game_id, False
+
+    # Jogo para a mensagem "connect" de quem pediu pareamento
+    def place(self, msg):
+        game_id, _ = self.assign(msg.get("rating"))
+        return game_id
+
+    # Quem esperava desistiu (ex.: desconectou); retorna False se o jogo já foi pareado
+    def cancel(self, game_id):
+        with self.lock:
+            if game_id not in self.bucket_of:
+                return False
+            bucket = self.bucket_of.pop(game_id)
+            queue = self.waiting[bucket]
+            del queue[game_id]
+            if not queue:
+                del self.waiting[bucket]
+            return True
+
+    # Devolve à fila um jogo já pareado em que ficou só um jogador (ex.: quem
+    # esperava saiu antes do adversário chegar); ele é o primeiro da faixa
+    def requeue(self, game_id, rating=None):
+        bucket = self.bucket(rating)
+        with self.lock:
+            if game_id in self.bucket_of:
+                return
+            queue = self.waiting.setdefault(bucket, OrderedDict())
+            queue[game_id] = None
+            queue.move_to_end(game_id, last=False)
+            self.bucket_of[game_id] = bucket
+
+    # Ids gerados pelo lobby; ninguém entra neles pelo game_id
+    def owns(self, game_id):
+        return re.fullmatch(re.escape(self.prefix) + r"\d+", str(game_id)) is not None
+
+    def is_waiting(self, game_id):
+        return game_id in self.bucket_of
+
+    def __len__(self):
+        return len(self.bucket_of)
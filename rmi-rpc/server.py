@@ -1,19 +1,171 @@
 import Pyro4
 import threading
-from game_logic import OthelloGame
+from game_logic import OthelloGame, color_name, squares, board_string, BLACK, WHITE
+from engine import OthelloEngine
+from solver import EndgameSolver, SolverTimeout
+from game_registry import GameRegistry
+from lobby import Lobby, DEFAULT_BUCKET_SIZE
+from journal import GameJournal, highest_id, JOURNAL_DIR, CHAT_HISTORY
+import itertools
 import time
 import socket
+from collections import Counter, deque
+
+# Campos das respostas que levam uma cor; no protocolo as cores são "black"/"white"
+COLOR_FIELDS = ("color", "next_turn", "current_turn")
+
+# Formatos do tabuleiro nas respostas, escolhidos pelo jogador ao conectar:
+# "list" (8 listas de "black"/"white"/None), "string" (64 caracteres "b", "w"
+# ou ".", linha a linha) ou "bitboards" ([pretas, brancas], inteiros de 64 bits)
+BOARD_FORMATS = ("list", "string", "bitboards")
+
+# Máximo de jogos por página em list_games
+MAX_LIST_LIMIT = 100
+
+# Jogador que não faz nenhuma chamada (o cliente consulta o estado a todo
+# instante, ou chama heartbeat) por este tempo é considerado desconectado
+PLAYER_TIMEOUT = 60.0
+# Jogos terminados ficam disponíveis por este tempo para a última consulta
+FINISHED_GAME_TTL = 5 * 60.0
+# Jogos sem nenhuma jogada por este tempo são descartados
+GAME_IDLE_TIMEOUT = 30 * 60.0
+# Intervalo entre as passagens do coletor
+REAP_INTERVAL = 30.0
+
+# Tempo máximo de espera de wait_for_events; menor que PLAYER_TIMEOUT, porque
+# o coletor só vê o jogador quando a chamada começa ou termina
+LONG_POLL_TIMEOUT = 25.0
+# O servidor de threads do Pyro prende uma thread a cada conexão aberta, e cada
+# cliente mantém duas (chamadas e long-poll): 1000 clientes parados ocupam 2000
+# conexões, mais uma folga para espectadores e reconexões
+THREADPOOL_SIZE = 2500
+# Eventos guardados por jogo; quem está mais atrasado que isso recebe o estado completo
+MAX_EVENTS = 1000
+
+# Chat de um jogo: as últimas mensagens em um buffer circular, com ids em
+# sequência dentro do jogo e, por jogador, o id da última mensagem entregue.
+# Buscar as não lidas custa só o número de mensagens novas
+class ChatLog:
+    def __init__(self, size=CHAT_HISTORY):
+        self.messages = deque(maxlen=size)
+        self.last_id = 0
+        self.cursors = {}  # {player_name: id da última mensagem entregue}
+
+    def add(self, player_name, color, message, timestamp=None, message_id=None):
+        self.last_id = message_id or self.last_id + 1
+        chat_message = {
+            "id": self.last_id,
+            "color": color,
+            "player_name": player_name,
+            "message": message,
+            "timestamp": timestamp or time.time()
+        }
+        self.messages.append(chat_message)
+        return chat_message
+
+    # Mensagem pelo id, ou None se já saiu do buffer; os ids no buffer são consecutivos
+    def get(self, message_id):
+        index = len(self.messages) - 1 - (self.last_id - message_id)
+        if 0 <= index < len(self.messages):
+            return self.messages[index]
+        return None
+
+    # Esvazia o buffer sem reiniciar a sequência: ids antigos nunca voltam a valer
+    def clear(self):
+        self.messages.clear()
+        self.cursors = {}
+
+    # Mensagens ainda não entregues ao jogador; as que já saíram do buffer se perdem
+    def unread(self, player_name):
+        count = min(self.last_id - self.cursors.get(player_name, 0), len(self.messages))
+        self.cursors[player_name] = self.last_id
+        return list(itertools.islice(reversed(self.messages), count))[::-1]
+
+    def mark_read(self, player_name):
+        self.cursors[player_name] = self.last_id
+
+    def __len__(self):
+        return len(self.messages)
+
+
+# Registro de eventos de um jogo, já no formato do protocolo, com os tabuleiros
+# que servem de base às diferenças de get_game_state. A versão de um jogo é o
+# número de eventos registrados desde o início: cresce a cada jogada, mensagem e
+# mudança de estado, e continua depois de um reinício. Só os últimos `size`
+# eventos ficam guardados; versões e cursores continuam absolutos
+class EventLog:
+    def __init__(self, black, white, size=MAX_EVENTS):
+        self.events = []
+        self.base = 0  # Versão do primeiro evento guardado
+        self.boards = [(0, black, white)]  # (versão, pretas, brancas)
+        self.size = size
+
+    def version(self):
+        return self.base + len(self.events)
+
+    # Ao passar do limite, a metade mais antiga sai de uma vez
+    def append(self, event):
+        self.events.append(event)
+        if len(self.events) > self.size:
+            dropped = len(self.events) - self.size // 2
+            del self.events[:dropped]
+            self.base += dropped
+            # Fica o último tabuleiro até a nova base, ponto de partida das diferenças
+            keep = max(i for i, (version, _, _) in enumerate(self.boards) if version <= self.base)
+            del self.boards[:keep]
+
+    def mark_board(self, black, white):
+        self.boards.append((self.version(), black, white))
+
+    # Eventos desde a versão `since`, ou None se parte deles já foi descartada
+    def since(self, since):
+        if since < self.base:
+            return None
+        return self.events[since - self.base:]
+
+    # Tabuleiro na versão `since` (o último marcado até ela)
+    def board_at(self, since):
+        return next(((black, white) for version, black, white in reversed(self.boards)
+                     if version <= since), None)
+
 
 @Pyro4.expose
 class OthelloServer:
-    def __init__(self, host='0.0.0.0', port=5000, log_callback=None):
+    def __init__(self, host='0.0.0.0', port=5000, log_callback=None, bot_time_limit=1.0,
+                 analysis_time_limit=5.0, analysis_max_empties=20,
+                 rating_bucket_size=DEFAULT_BUCKET_SIZE, player_timeout=PLAYER_TIMEOUT,
+                 finished_game_ttl=FINISHED_GAME_TTL, game_idle_timeout=GAME_IDLE_TIMEOUT,
+                 reap_interval=REAP_INTERVAL, journal_dir=None):
         self.host = host
         self.port = port
         self.log_callback = log_callback
         self.running = True
-        self.games = {}
-        self.chat_messages = {}  # {game_id: {message_id: {message_data, read_by: set()}}}
-        self.message_counter = 0  # Contador global de mensagens
+        self.bot_time_limit = bot_time_limit  # Tempo máximo por jogada do computador
+        self.bot_game_counter = itertools.count(1)
+        # Limites da análise exata de final de jogo
+        self.analysis_time_limit = analysis_time_limit
+        self.analysis_max_empties = analysis_max_empties
+        # Jogos em fatias com uma trava por jogo: as threads do Pyro atendem
+        # chamadas de jogos diferentes sem disputar uma trava global
+        self.games = GameRegistry()
+        # Fila de quem procura partida sem game_id, pareado por faixa de rating
+        self.lobby = Lobby(rating_bucket_size)
+        self.chat_messages = {}  # {game_id: ChatLog}
+        # Coletor de jogadores sumidos, jogos abandonados e seus chats
+        self.player_timeout = player_timeout
+        self.finished_game_ttl = finished_game_ttl
+        self.game_idle_timeout = game_idle_timeout
+        self.reap_interval = reap_interval
+        self.reclaimed = Counter()
+        self.stats_lock = threading.Lock()
+        if reap_interval:
+            threading.Thread(target=self._reap_loop, daemon=True).start()
+        # Diário em disco: as partidas sobrevivem a um reinício do servidor
+        self.journal = None
+        if journal_dir:
+            self.journal = GameJournal(journal_dir)
+            self._recover_games()
+            self.journal.start()
         
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -29,25 +181,125 @@ class OthelloServer:
         else:
             print(f"[{message_type}] {message}")
 
-    def connect_player(self, player_name, game_id="game1"):
+    # Cópia da resposta com os códigos de cor trocados pelos nomes do protocolo
+    def _wire(self, response):
+        wire = dict(response)
+        for field in COLOR_FIELDS:
+            if field in wire:
+                wire[field] = color_name(wire[field])
+        for field in ("players", "chat_messages"):
+            if field in wire:
+                wire[field] = [self._wire(item) for item in wire[field]]
+        return wire
+
+    # Reconstrói os jogos do diário. Os jogadores continuam nos seus lugares e
+    # a partida segue na próxima chamada deles
+    def _recover_games(self):
+        started = time.perf_counter()
+        states, records = self.journal.recover()
+        for game_id, state in states.items():
+            game_data = self.games.get_or_create(game_id, lambda: self._restore_game(game_id, state))
+            # O computador pode ter ficado devendo a resposta à última jogada antes da queda
+            if game_data.get("bot_engine") and any(p.get("bot") and p["color"] == state["turn"]
+                                                   for p in game_data["players"]):
+                threading.Thread(target=self._play_bot_turns, args=(game_id,), daemon=True).start()
+        
+        # Ids novos não podem repetir os dos jogos recuperados
+        self.bot_game_counter = itertools.count(highest_id(states, r".*-bot(\d+)") + 1)
+        self.lobby.counter = itertools.count(highest_id(states, self.lobby.prefix + r"(\d+)") + 1)
+        self.log(f"Diário: {len(states)} jogo(s) recuperado(s) e {records} registro(s) "
+                 f"relidos em {time.perf_counter() - started:.2f}s")
+
+    def _restore_game(self, game_id, state):
+        game_data = self._new_game()
+        game_data["game"] = OthelloGame.from_bitboards(state["black"], state["white"], state["turn"])
+        game_data["events"] = EventLog(state["black"], state["white"])
+        game_data["current_turn"] = state["turn"]
+        game_data["game_over"] = state["turn"] is None
+        if state["surrender"]:
+            winner, surrendered_by = state["surrender"]
+            game_data["surrender_info"] = {"winner": winner, "surrendered_by": surrendered_by}
+        for name, color, bot in state["players"]:
+            if bot:
+                game_data["players"].append({"color": color, "name": name, "bot": True})
+                game_data["bot_engine"] = OthelloEngine(time_limit=self.bot_time_limit)
+            else:
+                # Só quem voltou do diário pode retomar o lugar pelo nome
+                game_data["players"].append({"color": color, "name": name, "last_seen": time.monotonic(),
+                                             "recovered": True})
+        
+        # O chat recuperado já foi entregue antes da queda
+        if state["chat"]:
+            chat = self.chat_messages[game_id] = ChatLog()
+            for message_id, name, color, message, timestamp in state["chat"]:
+                chat.add(name, color, message, timestamp, message_id)
+            for player in game_data["players"]:
+                chat.mark_read(player["name"])
+        return game_data
+
+    # Registra o evento no diário; chamado com a trava do jogo adquirida
+    def _record(self, game_id, event, **fields):
+        if self.journal is not None:
+            self.journal.append({"e": event, "g": game_id, **fields})
+
+    def connect_player(self, player_name, game_id="game1", vs_bot=False, board_format="list"):
         try:
-            if game_id not in self.games:
-                self.games[game_id] = {
-                    "game": OthelloGame(),
-                    "players": [],
-                    "current_turn": "black",
-                    "game_just_started": False
-                }
+            if board_format not in BOARD_FORMATS:
+                return {"status": "error", "message": f"Formato de tabuleiro desconhecido: {board_format}"}
+            if vs_bot:
+                return self._connect_vs_bot(player_name, game_id, board_format)
+            # Jogos do lobby só aceitam pelo game_id quem retoma um lugar recuperado do diário
+            return self._join_game(player_name, game_id, board_format,
+                                   resume_only=self.lobby.owns(game_id))
             
-            game_data = self.games[game_id]
+        except Exception as e:
+            self.log(f"Erro ao conectar jogador: {e}", "ERROR")
+            return {"status": "error", "message": str(e)}
+
+    def _join_game(self, player_name, game_id, board_format, rating=None, resume_only=False):
+        if resume_only:
+            game_data = self.games.get(game_id)
+            if game_data is None:
+                return {"status": "error", "message": "Jogo reservado ao pareamento"}
+        else:
+            game_data = self.games.get_or_create(game_id, self._new_game)
+        
+        with game_data["lock"]:
+            # O jogo pode ter sido descartado enquanto esperávamos a trava
+            if self.games.get(game_id) is not game_data:
+                return self._join_game(player_name, game_id, board_format, rating, resume_only)
+            
+            # Lugar recuperado do diário e ainda não retomado volta para o seu dono
+            player = next((p for p in game_data["players"]
+                           if p["name"] == player_name and p.get("recovered")), None)
+            if player is not None:
+                del player["recovered"]
+                player["last_seen"] = time.monotonic()
+                player["board_format"] = board_format
+                self._requeue_lone_player(game_id, game_data)
+                return self._wire({
+                    "status": "connected",
+                    "color": player["color"],
+                    "game_started": len(game_data["players"]) == 2,
+                    "game_id": game_id,
+                    "resumed": True,
+                    "cursor": game_data["events"].version()
+                })
+            if resume_only:
+                return {"status": "error", "message": "Jogo reservado ao pareamento"}
             
             if len(game_data["players"]) < 2:
-                color = "black" if not game_data["players"] else "white"
+                color = BLACK if not game_data["players"] else WHITE
                 
                 game_data["players"].append({
                     "color": color,
-                    "name": player_name
+                    "name": player_name,
+                    "last_seen": time.monotonic(),
+                    "board_format": board_format
                 })
+                game_data["last_activity"] = time.monotonic()
+                self._record(game_id, "join", n=player_name, p=color)
+                self._requeue_lone_player(game_id, game_data, rating)
                 
                 self.log(f"Jogador '{player_name}' conectou-se ao servidor")
                 
@@ -55,127 +307,342 @@ class OthelloServer:
                 
                 if game_started:
                     game_data["game_just_started"] = True
-                    return {
+                    self._log_event(game_data, {"type": "game_started", "current_turn": BLACK})
+                    return self._wire({
                         "status": "connected",
                         "color": color,
-                        "game_started": True
-                    }
+                        "game_started": True,
+                        "game_id": game_id,
+                        "cursor": game_data["events"].version()
+                    })
                 
-                return {
+                return self._wire({
                     "status": "connected",
                     "color": color,
-                    "game_started": False
-                }
-            
-            return {"status": "error", "message": "Jogo cheio"}
-            
+                    "game_started": False,
+                    "game_id": game_id,
+                    "cursor": game_data["events"].version()
+                })
+        
+        return {"status": "error", "message": "Jogo cheio"}
+
+    # Um jogo do lobby com um só jogador não está mais na fila quando quem esperava
+    # sumiu depois do pareamento ou quando o jogo voltou do diário: ele volta para
+    # a fila, senão ninguém mais chegaria nele. Chamado com a trava do jogo adquirida
+    def _requeue_lone_player(self, game_id, game_data, rating=None):
+        if (self.lobby.owns(game_id) and len(game_data["players"]) == 1
+                and not self.lobby.is_waiting(game_id)):
+            self.lobby.requeue(game_id, rating)
+
+    # Entra na fila de pareamento: ou completa um jogo que já tem alguém
+    # esperando, ou abre um jogo novo e aguarda (game_started=False)
+    def find_match(self, player_name, rating=None, board_format="list"):
+        try:
+            if board_format not in BOARD_FORMATS:
+                return {"status": "error", "message": f"Formato de tabuleiro desconhecido: {board_format}"}
+            game_id, _ = self.lobby.assign(rating)
+            return self._join_game(player_name, game_id, board_format, rating)
         except Exception as e:
-            self.log(f"Erro ao conectar jogador: {e}", "ERROR")
+            self.log(f"Erro ao procurar partida: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
+    # Desiste de esperar um adversário; o jogo é descartado. Vale também para um
+    # jogo já pareado cujo adversário ainda não chegou: quem chegar cai em um
+    # jogo novo, que volta para a fila. Só quem está sozinho no jogo pode sair
+    def leave_lobby(self, game_id, player_name):
+        game_data = self.games.get(game_id)
+        if game_data is None or not self.lobby.owns(game_id):
+            return {"status": "error", "message": "Jogo não está aguardando adversário"}
+        with game_data["lock"]:
+            players = game_data["players"]
+            if (self.games.get(game_id) is not game_data or len(players) != 1
+                    or players[0]["name"] != player_name):
+                return {"status": "error", "message": "Jogo não está aguardando adversário"}
+            self.lobby.cancel(game_id)
+            self.games.remove(game_id)
+            self._record(game_id, "close")
+        self.chat_messages.pop(game_id, None)
+        return {"status": "success"}
+
+    def list_games(self, offset=0, limit=20):
+        try:
+            offset = max(0, int(offset))
+            limit = min(max(1, int(limit)), MAX_LIST_LIMIT)
+            items, total = self.games.page(offset, limit)
+            games = []
+            for game_id, game_data in items:
+                with game_data["lock"]:
+                    players = game_data["players"]
+                    if game_data.get("game_over", False):
+                        status = "finished"
+                    elif len(players) == 2:
+                        status = "playing"
+                    else:
+                        status = "waiting"
+                    games.append({
+                        "game_id": game_id,
+                        "players": [p["name"] for p in players],
+                        "spectators": len(game_data["spectators"]),
+                        "status": status,
+                        "vs_bot": "bot_engine" in game_data
+                    })
+            return {
+                "status": "success",
+                "type": "games",
+                "games": games,
+                "offset": offset,
+                "limit": limit,
+                "total": total
+            }
+        except Exception as e:
+            self.log(f"Erro ao listar jogos: {e}", "ERROR")
+            return {"status": "error", "message": str(e)}
+
+    def _new_game(self):
+        game = OthelloGame()
+        return {
+            "game": game,
+            "players": [],
+            "current_turn": BLACK,
+            "game_just_started": False,
+            "spectators": set(),
+            "events": EventLog(game.black, game.white),
+            "last_activity": time.monotonic()
+        }
+
+    def _connect_vs_bot(self, player_name, game_id, board_format="list"):
+        # Partidas contra o computador sempre têm um jogo próprio
+        game_id = f"{game_id}-bot{next(self.bot_game_counter)}"
+        game_data = self._new_game()
+        game_data["players"] = [
+            {"color": BLACK, "name": player_name, "last_seen": time.monotonic(),
+             "board_format": board_format},
+            {"color": WHITE, "name": "Computador", "bot": True}
+        ]
+        game_data["bot_engine"] = OthelloEngine(time_limit=self.bot_time_limit)
+        self.games.get_or_create(game_id, lambda: game_data)
+        with game_data["lock"]:
+            self._record(game_id, "join", n=player_name, p=BLACK)
+            self._record(game_id, "join", n="Computador", p=WHITE, bot=True)
+        self.log(f"Jogador '{player_name}' iniciou uma partida contra o computador")
+        return self._wire({
+            "status": "connected",
+            "color": BLACK,
+            "game_started": True,
+            "game_id": game_id,
+            "cursor": 0
+        })
+
     def make_move(self, game_id, player_name, row, col):
         try:
             game_data = self.games[game_id]
             
-            # Verifica se o jogo já terminou
-            if game_data.get("game_over", False):
-                return {"status": "error", "message": "O jogo já terminou"}
-            
-            game = game_data["game"]
-            player = next(p for p in game_data["players"] if p["name"] == player_name)
-            
-            if player["color"] != game_data["current_turn"]:
-                return {"status": "error", "message": "Não é sua vez"}
-            
-            if not game.is_valid_move(row, col, player["color"]):
-                return {"status": "error", "message": "Movimento inválido"}
-            
-            game.make_move(row, col, player["color"])
-            next_color = "white" if player["color"] == "black" else "black"
-            
-            # Verifica movimentos válidos para o próximo jogador
-            has_valid_moves = self._check_valid_moves(game, next_color)
-            
-            if not has_valid_moves:
-                current_has_moves = self._check_valid_moves(game, player["color"])
+            with game_data["lock"]:
+                # Verifica se o jogo já terminou
+                if game_data.get("game_over", False):
+                    return {"status": "error", "message": "O jogo já terminou"}
                 
-                if current_has_moves:
-                    next_color = player["color"]
-                    game_data["current_turn"] = next_color
-                    return {
-                        "status": "success",
-                        "row": row,
-                        "col": col,
-                        "color": player["color"],
-                        "next_turn": next_color,
-                        "no_valid_moves": True
-                    }
-                else:
-                    return self.handle_game_over(game_id)
+                game = game_data["game"]
+                player = next(p for p in game_data["players"] if p["name"] == player_name)
+                player["last_seen"] = time.monotonic()
+                
+                if player["color"] != game_data["current_turn"]:
+                    return {"status": "error", "message": "Não é sua vez"}
+                
+                if not game.is_valid_move(row, col, player["color"]):
+                    return {"status": "error", "message": "Movimento inválido"}
+                
+                response = self._apply_move(game_id, player, row, col)
+                
+                # Se agora for a vez do computador, ele joga em segundo plano
+                if game_data.get("bot_engine") and game_data["current_turn"] not in (None, player["color"]):
+                    threading.Thread(target=self._play_bot_turns, args=(game_id,), daemon=True).start()
             
-            game_data["current_turn"] = next_color
-            return {
-                "status": "success",
-                "row": row,
-                "col": col,
-                "color": player["color"],
-                "next_turn": next_color
-            }
+            return self._wire(response)
             
         except Exception as e:
             self.log(f"Erro ao fazer movimento: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
+    def _apply_move(self, game_id, player, row, col):
+        game_data = self.games[game_id]
+        game = game_data["game"]
+        game.make_move(row, col, player["color"])
+        # O próprio jogo já decidiu quem joga agora, inclusive passes e o fim
+        next_color = game.turn
+        game_data["last_activity"] = time.monotonic()
+        
+        response = {
+            "status": "success",
+            "row": row,
+            "col": col,
+            "color": player["color"],
+            "next_turn": next_color
+        }
+        if game.passed:
+            response["no_valid_moves"] = True
+        elif next_color is None:
+            self._record(game_id, "move", p=player["color"], r=row, c=col,
+                         b=game.black, w=game.white, t=None)
+            self._log_event(game_data, {"type": "move", **response})
+            self._mark_board(game_data)
+            game_over = self.handle_game_over(game_id, player.get("board_format", "list"))
+            self._log_event(game_data, game_over)
+            return game_over
+        
+        game_data["current_turn"] = next_color
+        # O diário guarda o tabuleiro resultante: a recuperação não refaz jogadas
+        self._record(game_id, "move", p=player["color"], r=row, c=col,
+                     b=game.black, w=game.white, t=next_color)
+        self._log_event(game_data, {"type": "move", **response})
+        self._mark_board(game_data)
+        return response
+
+    # Registro compartilhado dos eventos da partida, já no formato do protocolo:
+    # cada evento é convertido uma vez e lido por todos os espectadores e por
+    # quem espera em wait_for_events. Chamado com a trava do jogo adquirida
+    def _log_event(self, game_data, event):
+        wire = self._wire(event)
+        wire.pop("status", None)
+        wire.pop("board", None)
+        game_data["events"].append(wire)
+        self._changed(game_data).notify_all()
+
+    # Troca as referências de chat do registro pelas mensagens do ChatLog. As que
+    # já saíram do buffer viram "chat_expired", mantendo uma entrada por evento
+    # (os clientes contam os eventos para avançar o cursor). Chamado com a trava do jogo
+    def _expand_events(self, game_id, events):
+        chat = self.chat_messages.get(game_id)
+        expanded = []
+        for event in events:
+            if event["type"] == "chat":
+                message = chat.get(event["id"]) if chat else None
+                if message:
+                    event = self._wire({"type": "chat", **message})
+                else:
+                    event = {"type": "chat_expired", "id": event["id"]}
+            expanded.append(event)
+        return expanded
+
+    # Guarda o tabuleiro da versão atual, base das diferenças de get_game_state
+    def _mark_board(self, game_data):
+        game = game_data["game"]
+        game_data["events"].mark_board(game.black, game.white)
+
+    # Condição associada à trava do jogo; sobrevive ao reinício da partida, assim
+    # como o registro de eventos
+    def _changed(self, game_data):
+        changed = game_data.get("changed")
+        if changed is None:
+            changed = game_data["changed"] = threading.Condition(game_data["lock"])
+        return changed
+
+    def _play_bot_turns(self, game_id):
+        try:
+            game_data = self.games.get(game_id)
+            while game_data:
+                with game_data["lock"]:
+                    bot = next((p for p in game_data["players"] if p.get("bot")), None)
+                    if (bot is None or game_data.get("game_over", False)
+                            or game_data["current_turn"] != bot["color"]):
+                        return
+                    game = game_data["game"]
+                    position = (game.black, game.white)
+                
+                # A busca roda fora da trava; o motor trabalha em uma cópia do tabuleiro
+                move = game_data["bot_engine"].choose_move(game, bot["color"])
+                if move is None:
+                    return
+                with game_data["lock"]:
+                    # Durante a busca a partida pode ter sido descartada, encerrada
+                    # (ex.: desistência declarada pelo coletor), reiniciada ou jogada
+                    current = self.games.get(game_id)
+                    if current is not game_data:
+                        game_data = current
+                        continue
+                    if game_data.get("game_over", False):
+                        return
+                    if (game_data["game"] is not game or game_data["current_turn"] != bot["color"]
+                            or (game.black, game.white) != position):
+                        continue
+                    self._apply_move(game_id, bot, *move)
+        except Exception as e:
+            self.log(f"Erro na jogada do computador: {e}", "ERROR")
+
     def send_chat_message(self, game_id, player_name, message):
         try:
-            if game_id not in self.chat_messages:
-                self.chat_messages[game_id] = {}
-            
             game_data = self.games[game_id]
             player = next(p for p in game_data["players"] if p["name"] == player_name)
+            player["last_seen"] = time.monotonic()
             
-            self.message_counter += 1
-            message_id = self.message_counter
-            
-            chat_message = {
-                "id": message_id,
-                "color": player["color"],
-                "player_name": player_name,
-                "message": message,
-                "timestamp": time.time(),
-                "read_by": set()
-            }
-            
-            self.chat_messages[game_id][message_id] = chat_message
-            return {
-                "status": "success",
-                "type": "chat",
-                **{k: v for k, v in chat_message.items() if k != 'read_by'}
-            }
+            with game_data["lock"]:
+                chat = self.chat_messages.setdefault(game_id, ChatLog())
+                chat_message = chat.add(player_name, player["color"], message)
+                response = {
+                    "status": "success",
+                    "type": "chat",
+                    **chat_message
+                }
+                self._record(game_id, "chat", i=chat_message["id"], n=player_name, p=player["color"],
+                             m=message, ts=chat_message["timestamp"])
+                # O registro de eventos guarda só o id; o texto fica no ChatLog
+                self._log_event(game_data, {"type": "chat", "id": chat_message["id"]})
+            return self._wire(response)
             
         except Exception as e:
             self.log(f"Erro ao enviar mensagem: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
-    def _check_valid_moves(self, game, color):
-        for r in range(game.board_size):
-            for c in range(game.board_size):
-                if game.board[r][c] is None and game.is_valid_move(r, c, color):
-                    return True
-        return False
-
-    def handle_game_over(self, game_id):
-        try:
-            game_data = self.games[game_id]
-            game = game_data["game"]
+    # Placar, vencedor e tabuleiro da posição atual, calculados uma vez por
+    # jogada aceita e reaproveitados por todas as consultas até a próxima
+    # (o tabuleiro em cada formato só na primeira vez em que é pedido).
+    # As jogadas legais de cada cor já ficam guardadas no próprio OthelloGame
+    def _position(self, game_data):
+        game = game_data["game"]
+        position = game_data.get("position")
+        if position is None or position["key"] != (game.black, game.white):
             black_count, white_count = game.get_score()
-            
             if black_count > white_count:
                 winner = "black"
             elif white_count > black_count:
                 winner = "white"
             else:
                 winner = "tie"
+            position = game_data["position"] = {
+                "key": (game.black, game.white),
+                "black_count": black_count,
+                "white_count": white_count,
+                "winner": winner,
+                "boards": {}
+            }
+        return position
+
+    def _board(self, game_data, board_format="list"):
+        boards = self._position(game_data)["boards"]
+        board = boards.get(board_format)
+        if board is None:
+            game = game_data["game"]
+            if board_format == "string":
+                board = board_string(game.black, game.white)
+            elif board_format == "bitboards":
+                board = [game.black, game.white]
+            else:
+                board = game.board
+            boards[board_format] = board
+        return board
+
+    # Só nome e cor: os demais campos de cada lugar são controle interno do servidor
+    def _public_players(self, game_data):
+        return [{"name": p["name"], "color": p["color"]} for p in game_data["players"]]
+
+    def _board_format(self, game_data, player_name):
+        return next((p.get("board_format", "list") for p in game_data["players"]
+                     if p["name"] == player_name), "list")
+
+    def handle_game_over(self, game_id, board_format="list"):
+        try:
+            game_data = self.games[game_id]
+            position = self._position(game_data)
             
             # Marca o jogo como terminado
             game_data["game_over"] = True
@@ -184,16 +651,122 @@ class OthelloServer:
             return {
                 "status": "success",
                 "type": "game_over",
-                "winner": winner,
-                "black_count": black_count,
-                "white_count": white_count,
-                "board": game.board
+                "winner": position["winner"],
+                "black_count": position["black_count"],
+                "white_count": position["white_count"],
+                "board": self._board(game_data, board_format)
             }
         except Exception as e:
             self.log(f"Erro ao finalizar o jogo: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
-    def get_game_state(self, game_id, player_name):
+    # Com since_version (a "version" da resposta anterior) a resposta é só
+    # "unchanged" quando nada aconteceu, ou um "delta" com as casas alteradas e
+    # os eventos novos. Sem ela, ou quando a diferença não basta, vem o estado completo
+    def get_game_state(self, game_id, player_name, since_version=None):
+        game_data = self.games.get(game_id)
+        if not game_data:
+            return {"status": "error", "message": "Jogo não encontrado"}
+        # A consulta marca mensagens como lidas e pode encerrar o jogo
+        with game_data["lock"]:
+            self._touch(game_data, player_name)
+            version = game_data["events"].version()
+            if since_version == version:
+                return {"status": "success", "type": "unchanged", "version": since_version}
+            
+            response = None
+            if since_version is not None and since_version < version:
+                response = self._game_delta(game_id, player_name, since_version)
+            if response is None:
+                response = self._game_state(game_id, player_name)
+            response["version"] = version
+            return self._wire(response)
+
+    # Diferença desde since_version. None quando só o estado completo serve:
+    # jogo terminado, desistência pendente ou eventos da versão já descartados
+    def _game_delta(self, game_id, player_name, since_version):
+        game_data = self.games[game_id]
+        if game_data.get("game_over", False) or game_data.get("surrender_request"):
+            return None
+        log = game_data["events"]
+        events = log.since(since_version)
+        base = log.board_at(since_version)
+        if events is None or base is None:
+            return None
+        
+        game = game_data["game"]
+        changed = (game.black ^ base[0]) | (game.white ^ base[1])
+        changes = ([[row, col, "black"] for row, col in squares(changed & game.black)] +
+                   [[row, col, "white"] for row, col in squares(changed & game.white)] +
+                   [[row, col, None] for row, col in squares(changed & ~(game.black | game.white))])
+        
+        # O chat segue em chat_messages, como no estado completo
+        events = [event for event in events if event["type"] != "chat"]
+        if any(event["type"] == "game_started" for event in events):
+            game_data["game_just_started"] = False
+        
+        position = self._position(game_data)
+        return {
+            "status": "success",
+            "type": "delta",
+            "current_turn": game_data["current_turn"],
+            "black_count": position["black_count"],
+            "white_count": position["white_count"],
+            "changes": changes,
+            "events": events,
+            "chat_messages": self._unread_messages(game_id, player_name)
+        }
+
+    # Mensagens que o jogador ainda não recebeu; ficam marcadas como lidas
+    def _unread_messages(self, game_id, player_name):
+        chat = self.chat_messages.get(game_id)
+        return chat.unread(player_name) if chat else []
+
+    # Long-poll: responde assim que houver eventos depois de `since` (jogadas,
+    # chat, pedidos de desistência, fim de jogo) ou, sem novidades, quando o
+    # tempo acaba. O cliente guarda o "cursor" da resposta para a próxima chamada.
+    # Com "resync" o registro recomeçou (ex.: servidor reiniciado) ou os eventos
+    # desde `since` já foram descartados, e o cliente deve buscar o estado
+    # completo com get_game_state
+    def wait_for_events(self, game_id, player_name, since=0, timeout=LONG_POLL_TIMEOUT):
+        game_data = self.games.get(game_id)
+        if not game_data:
+            return {"status": "error", "message": "Jogo não encontrado"}
+        timeout = min(max(0.0, float(timeout)), LONG_POLL_TIMEOUT)
+        
+        with game_data["lock"]:
+            self._touch(game_data, player_name)
+            log = game_data["events"]
+            if since <= log.version():
+                # wait_for libera a trava do jogo enquanto espera
+                self._changed(game_data).wait_for(lambda: log.version() > since, timeout)
+                self._touch(game_data, player_name)
+            events = log.since(since) if since <= log.version() else None
+            if events is None:
+                return {"status": "success", "type": "events", "events": [],
+                        "cursor": log.version(), "resync": True}
+            return {
+                "status": "success",
+                "type": "events",
+                "events": self._expand_events(game_id, events),
+                "cursor": log.version()
+            }
+
+    # Para clientes que passam muito tempo sem outras chamadas
+    def heartbeat(self, game_id, player_name):
+        game_data = self.games.get(game_id)
+        if not game_data:
+            return {"status": "error", "message": "Jogo não encontrado"}
+        with game_data["lock"]:
+            self._touch(game_data, player_name)
+        return {"status": "success"}
+
+    def _touch(self, game_data, player_name):
+        for player in game_data["players"]:
+            if player["name"] == player_name:
+                player["last_seen"] = time.monotonic()
+
+    def _game_state(self, game_id, player_name):
         try:
             game_data = self.games.get(game_id)
             if not game_data:
@@ -223,17 +796,10 @@ class OthelloServer:
             
             # Se o jogo já terminou normalmente
             if game_data.get("game_over", False):
-                return self.handle_game_over(game_id)
+                return self.handle_game_over(game_id, self._board_format(game_data, player_name))
             
             # Filtra mensagens não lidas pelo jogador atual
-            unread_messages = []
-            if game_id in self.chat_messages:
-                for msg_id, msg in self.chat_messages[game_id].items():
-                    if player_name not in msg["read_by"]:
-                        msg["read_by"].add(player_name)
-                        unread_messages.append({
-                            k: v for k, v in msg.items() if k != 'read_by'
-                        })
+            unread_messages = self._unread_messages(game_id, player_name)
             
             game = game_data["game"]
             current_turn = game_data["current_turn"]
@@ -245,17 +811,15 @@ class OthelloServer:
                     "status": "success",
                     "type": "game_started",
                     "current_turn": current_turn,
-                    "players": game_data["players"]
+                    "players": self._public_players(game_data)
                 }
             
             # Verifica se há movimentos válidos
-            has_valid_moves = self._check_valid_moves(game, current_turn)
-            if not has_valid_moves:
-                opponent_color = "white" if current_turn == "black" else "black"
-                opponent_has_moves = self._check_valid_moves(game, opponent_color)
+            if not game.has_moves(current_turn):
+                opponent_color = -current_turn
                 
-                if not opponent_has_moves:
-                    return self.handle_game_over(game_id)
+                if game.is_game_over():
+                    return self.handle_game_over(game_id, self._board_format(game_data, player_name))
                 
                 return {
                     "status": "success",
@@ -265,15 +829,15 @@ class OthelloServer:
                 }
             
             # Retorna o estado atual do jogo
-            black_count, white_count = game.get_score()
+            position = self._position(game_data)
             return {
                 "status": "success",
                 "type": "game_state",
                 "current_turn": current_turn,
-                "black_count": black_count,
-                "white_count": white_count,
-                "board": game.board,
-                "players": game_data["players"],
+                "black_count": position["black_count"],
+                "white_count": position["white_count"],
+                "board": self._board(game_data, self._board_format(game_data, player_name)),
+                "players": self._public_players(game_data),
                 "chat_messages": unread_messages  # Adiciona mensagens ao estado
             }
             
@@ -281,102 +845,296 @@ class OthelloServer:
             self.log(f"Erro ao obter estado do jogo: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
-    def reset_game(self, game_id):
+    # Observador somente leitura: recebe o retrato da partida e a posição no
+    # registro de eventos a partir da qual deve pedir as novidades
+    def spectate(self, game_id, spectator_name="Espectador", board_format="list"):
         try:
-            if game_id in self.games:
-                # Preserva os jogadores mas reinicia o jogo
-                players = self.games[game_id]["players"]
-                
-                # Reseta o estado do jogo
-                self.games[game_id] = {
-                    "game": OthelloGame(),
-                    "players": players,
-                    "current_turn": "black",
-                    "game_just_started": True,
-                    "game_over": False  # Novo flag para controlar estado do jogo
-                }
-                
-                # Limpa as mensagens do chat
-                if game_id in self.chat_messages:
-                    self.chat_messages[game_id] = {}
-                
-                # Notifica todos os jogadores sobre o reinício
-                for player in players:
-                    player["ready_for_new_game"] = True
+            game_data = self.games.get(game_id)
+            if not game_data:
+                return {"status": "error", "message": "Jogo não encontrado"}
+            
+            # Retrato e cursor sob a trava: nenhum evento fica de fora
+            with game_data["lock"]:
+                game_data["spectators"].add(spectator_name)
+                self.log(f"Espectador '{spectator_name}' assistindo ao jogo {game_id}")
                 
+                position = self._position(game_data)
+                return self._wire({
+                    "status": "success",
+                    "type": "spectating",
+                    "game_id": game_id,
+                    "current_turn": game_data["current_turn"],
+                    "black_count": position["black_count"],
+                    "white_count": position["white_count"],
+                    "board": self._board(game_data, board_format),
+                    "players": self._public_players(game_data),
+                    "spectators": len(game_data["spectators"]),
+                    "game_over": game_data.get("game_over", False),
+                    "cursor": game_data["events"].version()
+                })
+        except Exception as e:
+            self.log(f"Erro ao adicionar espectador: {e}", "ERROR")
+            return {"status": "error", "message": str(e)}
+
+    # Eventos desde `since`; o espectador guarda o "cursor" devolvido para a próxima chamada.
+    # Com "resync" os eventos desde `since` não existem mais e o espectador
+    # deve pedir um retrato novo com spectate.
+    # Não há estado por espectador no servidor, então o custo de cada jogada
+    # não depende de quantos estão assistindo
+    def get_spectator_updates(self, game_id, since=0):
+        try:
+            game_data = self.games.get(game_id)
+            if not game_data:
+                return {"status": "error", "message": "Jogo não encontrado"}
+            
+            with game_data["lock"]:
+                log = game_data["events"]
+                events = log.since(since) if since <= log.version() else None
+                if events is None:
+                    return {"status": "success", "type": "spectator_updates", "events": [],
+                            "cursor": log.version(), "resync": True}
                 return {
                     "status": "success",
-                    "type": "game_reset",
-                    "current_turn": "black"
+                    "type": "spectator_updates",
+                    "events": self._expand_events(game_id, events),
+                    "cursor": log.version()
                 }
         except Exception as e:
-            self.log(f"Erro ao reiniciar o jogo: {e}", "ERROR")
+            self.log(f"Erro ao obter eventos do jogo: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
-    def request_surrender(self, game_id, player_name):
+    def leave_spectator(self, game_id, spectator_name):
+        game_data = self.games.get(game_id)
+        if game_data:
+            game_data["spectators"].discard(spectator_name)
+        return {"status": "success"}
+
+    def analyze_position(self, game_id):
         try:
-            game_data = self.games[game_id]
-            if game_data.get("game_over", False):
-                return {"status": "error", "message": "O jogo já terminou"}
+            game_data = self.games.get(game_id)
+            if not game_data:
+                return {"status": "error", "message": "Jogo não encontrado"}
             
-            opponent = next(p for p in game_data["players"] if p["name"] != player_name)
+            # A análise pode levar segundos: resolve uma cópia da posição, fora da trava
+            with game_data["lock"]:
+                game = game_data["game"]
+                game = OthelloGame.from_bitboards(game.black, game.white, game.turn)
+            solver = EndgameSolver(max_empties=self.analysis_max_empties,
+                                   time_limit=self.analysis_time_limit)
+            try:
+                result = solver.solve(game)
+            except SolverTimeout:
+                return {"status": "error", "message": "Tempo de análise esgotado"}
             
-            # Armazena a solicitação de desistência
-            game_data["surrender_request"] = {
-                "requester": player_name,
-                "pending": True
-            }
-            
-            return {
+            black_minus_white = result["score"] if result["color"] == BLACK else -result["score"]
+            return self._wire({
                 "status": "success",
-                "type": "surrender_request",
-                "player_name": player_name
-            }
+                "type": "analysis",
+                "color": result["color"] if game.turn is not None else None,
+                "score": result["score"],
+                "black_minus_white": black_minus_white,
+                "best_move": list(result["best_move"]) if result["best_move"] else None,
+                "empties": result["empties"],
+                "nodes": result["nodes"]
+            })
         except Exception as e:
-            self.log(f"Erro ao solicitar desistência: {e}", "ERROR")
+            self.log(f"Erro ao analisar a posição: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
-    def respond_to_surrender(self, game_id, player_name, accepted):
+    def reset_game(self, game_id):
         try:
-            game_data = self.games[game_id]
-            if not game_data.get("surrender_request"):
-                return {"status": "error", "message": "Não há solicitação de desistência pendente"}
-            
-            surrendered_by = game_data["surrender_request"]["requester"]
-            
-            if accepted:
-                # Finaliza o jogo com vitória do oponente
-                game_data["game_over"] = True
-                game_data["current_turn"] = None
-                # Armazena informações da desistência
-                game_data["surrender_info"] = {
-                    "winner": player_name,
-                    "surrendered_by": surrendered_by
-                }
+            previous = self.games.get(game_id)
+            if previous:
+                with previous["lock"]:
+                    # Preserva os jogadores mas reinicia o jogo
+                    players = previous["players"]
+                    bot_engine = previous.get("bot_engine")
+                    
+                    # Reseta o estado do jogo; a trava continua a mesma.
+                    # Os espectadores continuam assistindo; o registro de eventos também
+                    game_data = self.games.replace(game_id, {
+                        "game": OthelloGame(),
+                        "players": players,
+                        "current_turn": BLACK,
+                        "game_just_started": True,
+                        "game_over": False,  # Novo flag para controlar estado do jogo
+                        "spectators": previous["spectators"],
+                        "events": previous["events"],
+                        "last_activity": time.monotonic()
+                    })
+                    if "changed" in previous:
+                        game_data["changed"] = previous["changed"]
+                    if bot_engine:
+                        game_data["bot_engine"] = bot_engine
+                    
+                    # Limpa as mensagens do chat
+                    if game_id in self.chat_messages:
+                        self.chat_messages[game_id].clear()
+                    
+                    # Notifica todos os jogadores sobre o reinício
+                    for player in players:
+                        player["ready_for_new_game"] = True
+                    self._record(game_id, "reset")
+                    self._log_event(game_data, {"type": "game_reset", "current_turn": BLACK})
+                    self._mark_board(game_data)
                 
-                return {
+                return self._wire({
                     "status": "success",
-                    "type": "game_over_surrender",
-                    "winner": player_name,
-                    "surrender": True,
-                    "surrendered_by": surrendered_by
+                    "type": "game_reset",
+                    "current_turn": BLACK
+                })
+        except Exception as e:
+            self.log(f"Erro ao reiniciar o jogo: {e}", "ERROR")
+            return {"status": "error", "message": str(e)}
+
+    def request_surrender(self, game_id, player_name):
+        try:
+            game_data = self.games[game_id]
+            with game_data["lock"]:
+                self._touch(game_data, player_name)
+                if game_data.get("game_over", False):
+                    return {"status": "error", "message": "O jogo já terminou"}
+                
+                opponent = next(p for p in game_data["players"] if p["name"] != player_name)
+                
+                # Armazena a solicitação de desistência
+                game_data["surrender_request"] = {
+                    "requester": player_name,
+                    "pending": True
                 }
-            else:
-                print("Desistência recusada")
-                print(game_data)
-                # Cancela a solicitação de desistência
-                game_data.pop("surrender_request")
+                self._log_event(game_data, {"type": "surrender_request", "requester": player_name})
+                
                 return {
                     "status": "success",
-                    "type": "surrender_cancelled",
-                    "requester": surrendered_by
+                    "type": "surrender_request",
+                    "player_name": player_name
                 }
+        except Exception as e:
+            self.log(f"Erro ao solicitar desistência: {e}", "ERROR")
+            return {"status": "error", "message": str(e)}
+
+    def respond_to_surrender(self, game_id, player_name, accepted):
+        try:
+            game_data = self.games[game_id]
+            with game_data["lock"]:
+                self._touch(game_data, player_name)
+                if not game_data.get("surrender_request"):
+                    return {"status": "error", "message": "Não há solicitação de desistência pendente"}
+                
+                surrendered_by = game_data["surrender_request"]["requester"]
+                
+                if accepted:
+                    # Finaliza o jogo com vitória do oponente
+                    game_data["game_over"] = True
+                    game_data["current_turn"] = None
+                    # Armazena informações da desistência
+                    game_data["surrender_info"] = {
+                        "winner": player_name,
+                        "surrendered_by": surrendered_by
+                    }
+                    self._record(game_id, "surrender", winner=player_name, by=surrendered_by)
+                    
+                    response = {
+                        "status": "success",
+                        "type": "game_over_surrender",
+                        "winner": player_name,
+                        "surrender": True,
+                        "surrendered_by": surrendered_by
+                    }
+                    self._log_event(game_data, response)
+                    return response
+                else:
+                    self.log(f"Desistência recusada no jogo {game_id}")
+                    # Cancela a solicitação de desistência
+                    game_data.pop("surrender_request")
+                    response = {
+                        "status": "success",
+                        "type": "surrender_cancelled",
+                        "requester": surrendered_by
+                    }
+                    self._log_event(game_data, response)
+                    return response
         except Exception as e:
             self.log(f"Erro ao processar resposta de desistência: {e}", "ERROR")
             return {"status": "error", "message": str(e)}
 
+    def get_server_stats(self):
+        with self.stats_lock:
+            reclaimed = dict(self.reclaimed)
+        return {
+            "status": "success",
+            "games": len(self.games),
+            "lobby_waiting": len(self.lobby),
+            "chat_games": len(self.chat_messages),
+            "threads": threading.active_count(),
+            "reclaimed": reclaimed
+        }
+
+    def _reap_loop(self):
+        while self.running:
+            time.sleep(self.reap_interval)
+            try:
+                self._reap()
+            except Exception as e:
+                self.log(f"Erro no coletor de jogos: {e}", "ERROR")
+
+    # Remove jogadores que pararam de chamar o servidor e descarta jogos
+    # terminados há mais de finished_game_ttl, sem jogadores ou parados há
+    # mais de game_idle_timeout, junto com o histórico do chat
+    def _reap(self):
+        now = time.monotonic()
+        reclaimed = Counter()
+        for game_id, game_data in self.games.items():
+            with game_data["lock"]:
+                humans = [p for p in game_data["players"] if not p.get("bot")]
+                gone = [p for p in humans if now - p.get("last_seen", now) > self.player_timeout]
+                if gone:
+                    reclaimed["players"] += len(gone)
+                    game_data["players"] = [p for p in game_data["players"] if p not in gone]
+                    for player in gone:
+                        self._record(game_id, "leave", n=player["name"])
+                    humans = [p for p in humans if p not in gone]
+                    # Quem ficou vence a partida abandonada pelo adversário
+                    if humans and len(game_data["players"]) == 1 and not game_data.get("game_over", False):
+                        game_data["game_over"] = True
+                        game_data["current_turn"] = None
+                        game_data["surrender_info"] = {
+                            "winner": humans[0]["name"],
+                            "surrendered_by": gone[0]["name"]
+                        }
+                        game_data["last_activity"] = now
+                        self._record(game_id, "surrender", winner=humans[0]["name"], by=gone[0]["name"])
+                        self._log_event(game_data, {
+                            "type": "game_over_surrender",
+                            "winner": humans[0]["name"],
+                            "surrender": True,
+                            "surrendered_by": gone[0]["name"]
+                        })
+                
+                idle = now - game_data["last_activity"]
+                if game_data.get("game_over", False):
+                    expired = idle > self.finished_game_ttl
+                else:
+                    expired = idle > self.game_idle_timeout
+                if humans and not expired:
+                    continue
+                
+                self.games.remove(game_id)
+                self.lobby.cancel(game_id)
+                self._record(game_id, "close")
+                reclaimed["games"] += 1
+                reclaimed["chat_messages"] += len(self.chat_messages.pop(game_id, {}))
+        
+        if reclaimed:
+            with self.stats_lock:
+                self.reclaimed.update(reclaimed)
+            self.log(f"Coletor: {reclaimed['games']} jogo(s), {reclaimed['players']} jogador(es) "
+                     f"e {reclaimed['chat_messages']} mensagem(ns) de chat liberados")
+        return reclaimed
+
 def start_server(host='0.0.0.0', port=5000):
-    server = OthelloServer(host=host, port=port)
+    Pyro4.config.THREADPOOL_SIZE = THREADPOOL_SIZE
+    server = OthelloServer(host=host, port=port, journal_dir=JOURNAL_DIR)
     daemon = Pyro4.Daemon(host=host, port=port)
     uri = daemon.register(server, "othello.server")
     print(f"URI do servidor: {uri}")
@@ -65,8 +65,10 @@ class ServerGUI:
 
     def start_server(self):
         try:
-            from server import OthelloServer
-            server = OthelloServer(log_callback=self.log_message)
+            from server import OthelloServer, THREADPOOL_SIZE
+            from journal import JOURNAL_DIR
+            server = OthelloServer(log_callback=self.log_message, journal_dir=JOURNAL_DIR)
+            Pyro4.config.THREADPOOL_SIZE = THREADPOOL_SIZE
             self.daemon = Pyro4.Daemon(host='0.0.0.0', port=5000)
             uri = self.daemon.register(server, "othello.server")
             
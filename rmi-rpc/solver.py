@@ -0,0 +1,223 @@
+import time
+
+from game_logic import valid_moves_mask, flips_mask, BLACK
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Quadrantes do tabuleiro, usados na ordenação por paridade
+QUADRANTS = (
+    0x000000000F0F0F0F,
+    0x00000000F0F0F0F0,
+    0x0F0F0F0F00000000,
+    0xF0F0F0F000000000,
+)
+CORNERS = 0x8100000000000081
+
+# Abaixo destes limites de casas vazias a tabela de transposição e a ordenação
+# por mobilidade custam mais do que economizam
+TT_MIN_EMPTIES = 7
+FASTEST_FIRST_MIN_EMPTIES = 6
+# Com poucas casas vazias é mais barato testar cada uma do que gerar as jogadas
+SHALLOW_EMPTIES = 5
+
+# Quantos nós entre cada verificação do relógio
+CLOCK_INTERVAL = 1024
+
+HASH_MASK = (1 << 64) - 1
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+class EndgameSolver:
+    def __init__(self, max_empties=20, time_limit=None, tt_bits=18):
+        self.max_empties = max_empties
+        self.time_limit = time_limit
+        self.tt = TranspositionTable(tt_bits)
+        self.deadline = None
+        self.nodes = 0
+
+    # Resolve a posição de `game` para `color` (padrão: quem tem a vez).
+    # Retorna a diferença final de peças vista por `color` e a melhor jogada
+    def solve(self, game, color=None):
+        if color is None:
+            color = game.turn
+        # Jogo terminado: apenas o placar final, visto pelas pretas
+        finished = color is None
+        if finished:
+            color = BLACK
+        own, opp = (game.black, game.white) if color == BLACK else (game.white, game.black)
+        empties = 64 - (own | opp).bit_count()
+        if empties > self.max_empties:
+            raise ValueError(f"Posição com {empties} casas vazias; o limite é {self.max_empties}")
+
+        start = time.perf_counter()
+        self.deadline = start + self.time_limit if self.time_limit else None
+        self.nodes = 0
+        self.tt.new_search()
+
+        if finished:
+            score, best = own.bit_count() - opp.bit_count(), None
+        else:
+            score, best = self.solve_root(own, opp, empties)
+        return {
+            "color": color,
+            "score": score,
+            "best_move": None if best is None else (best >> 3, best & 7),
+            "empties": empties,
+            "nodes": self.nodes,
+            "time": time.perf_counter() - start
+        }
+
+    def solve_root(self, own, opp, empties):
+        moves = valid_moves_mask(own, opp)
+        if not moves:
+            # Quem tem a vez precisa passar
+            if not valid_moves_mask(opp, own):
+                return own.bit_count() - opp.bit_count(), None
+            return -self.search(opp, own, -64, 64, empties, False), None
+
+        alpha, beta = -65, 65
+        best = None
+        for square in self.order_moves(own, opp, moves, empties, None):
+            flips = flips_mask(own, opp, square)
+            new_own = own | flips | (1 << square)
+            new_opp = opp & ~flips
+            if best is None:
+                value = -self.search(new_opp, new_own, -beta, -alpha, empties - 1, False)
+            else:
+                # Janela nula: só busca de novo se a jogada puder ser melhor
+                value = -self.search(new_opp, new_own, -alpha - 1, -alpha, empties - 1, False)
+                if value > alpha:
+                    value = -self.search(new_opp, new_own, -beta, -alpha, empties - 1, False)
+            if best is None or value > alpha:
+                alpha = value
+                best = square
+        return alpha, best
+
+    def search(self, own, opp, alpha, beta, empties, passed):
+        self.nodes += 1
+        if self.deadline and self.nodes % CLOCK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SolverTimeout()
+
+        if empties <= SHALLOW_EMPTIES:
+            return self.search_shallow(own, opp, alpha, beta, empties, False)
+
+        moves = valid_moves_mask(own, opp)
+        if not moves:
+            if passed:
+                return own.bit_count() - opp.bit_count()
+            return -self.search(opp, own, -beta, -alpha, empties, True)
+
+        key = None
+        tt_move = None
+        alpha_orig = alpha
+        if empties >= TT_MIN_EMPTIES:
+            # Chave exata: a posição inteira acima de 64 bits de hash, que dão o
+            # índice na tabela. Posições diferentes nunca dividem uma entrada
+            key = (own << 128) | (opp << 64) | (hash((own, opp)) & HASH_MASK)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                _, tt_value, tt_bound, tt_move = entry
+                if tt_bound == EXACT:
+                    return tt_value
+                if tt_bound == LOWER and tt_value >= beta:
+                    return tt_value
+                if tt_bound == UPPER and tt_value <= alpha:
+                    return tt_value
+
+        best_value = -65
+        best_move = None
+        first = True
+        for square in self.order_moves(own, opp, moves, empties, tt_move):
+            flips = flips_mask(own, opp, square)
+            new_own = own | flips | (1 << square)
+            new_opp = opp & ~flips
+            if first:
+                value = -self.search(new_opp, new_own, -beta, -alpha, empties - 1, False)
+                first = False
+            else:
+                value = -self.search(new_opp, new_own, -alpha - 1, -alpha, empties - 1, False)
+                if alpha < value < beta:
+                    value = -self.search(new_opp, new_own, -beta, -value, empties - 1, False)
+            if value > best_value:
+                best_value = value
+                best_move = square
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if key is not None:
+            if best_value <= alpha_orig:
+                bound = UPPER
+            elif best_value >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            self.tt.store(key, empties, best_value, bound, best_move)
+        return best_value
+
+    # Busca perto do fim: percorre as casas vazias, primeiro as de quadrantes ímpares
+    def search_shallow(self, own, opp, alpha, beta, empties, passed):
+        empty = ~(own | opp) & 0xFFFFFFFFFFFFFFFF
+        if not empty:
+            return own.bit_count() - opp.bit_count()
+        odd = 0
+        for quadrant in QUADRANTS:
+            if (empty & quadrant).bit_count() & 1:
+                odd |= quadrant
+
+        best_value = -65
+        for group in (empty & odd, empty & ~odd):
+            while group:
+                low = group & -group
+                group ^= low
+                flips = flips_mask(own, opp, low.bit_length() - 1)
+                if not flips:
+                    continue
+                self.nodes += 1
+                value = -self.search_shallow(opp & ~flips, own | flips | low, -beta, -alpha, empties - 1, False)
+                if value > best_value:
+                    best_value = value
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:
+                            return best_value
+
+        if best_value == -65:
+            # Nenhuma jogada: passa a vez ou encerra o jogo
+            if passed:
+                return own.bit_count() - opp.bit_count()
+            return -self.search_shallow(opp, own, -beta, -alpha, empties, True)
+        return best_value
+
+    # Ordena as jogadas: melhor jogada da tabela primeiro; com muitas casas vazias,
+    # a que deixa o adversário com menos opções (fastest-first); com poucas,
+    # jogadas em quadrantes com número ímpar de casas vazias (paridade)
+    def order_moves(self, own, opp, moves, empties, first_move):
+        squares = []
+        while moves:
+            low = moves & -moves
+            squares.append(low.bit_length() - 1)
+            moves ^= low
+        if len(squares) > 1:
+            if empties >= FASTEST_FIRST_MIN_EMPTIES:
+                def mobility_after(square):
+                    flips = flips_mask(own, opp, square)
+                    new_own = own | flips | (1 << square)
+                    new_opp = opp & ~flips
+                    corner_bonus = -1 if (1 << square) & CORNERS else 0
+                    return valid_moves_mask(new_opp, new_own).bit_count() * 2 + corner_bonus
+                squares.sort(key=mobility_after)
+            else:
+                empty = ~(own | opp)
+                odd = 0
+                for quadrant in QUADRANTS:
+                    if (empty & quadrant).bit_count() & 1:
+                        odd |= quadrant
+                squares.sort(key=lambda square: 0 if (1 << square) & odd else 1)
+        if first_move is not None and first_move in squares:
+            squares.remove(first_move)
+            squares.insert(0, first_move)
+        return squares
@@ -0,0 +1,281 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from server import (OthelloServer, MAX_OUTBOUND_BYTES, IDLE_TIMEOUT, GAME_IDLE_TIMEOUT,
+                    REAP_INTERVAL, QUERY_TYPES, enable_keepalive)
+from lobby import DEFAULT_BUCKET_SIZE
+from journal import JOURNAL_DIR
+from protocol import MessageStream, RECV_SIZE, HEARTBEAT_VERSION
+
+# Tempo para o cliente ler o que falta depois do meio fechamento da conexão
+CLOSE_GRACE = 2.0
+# Tempo máximo que stop() espera o loop encerrar as conexões
+STOP_TIMEOUT = 10.0
+
+class ClientConnection:
+    # Substitui o socket no dicionário do jogador: o OthelloServer só usa sendall e close.
+    # O buffer do transporte é a fila de saída; acima do limite o cliente é desconectado
+    # (a política "block" não se aplica aqui, pois esperar travaria o loop)
+    def __init__(self, writer, max_write_buffer=MAX_OUTBOUND_BYTES):
+        self.writer = writer
+        self.max_write_buffer = max_write_buffer
+        self.closed = False
+
+    def sendall(self, data):
+        if self.closed:
+            raise ConnectionError("Conexão encerrada")
+        if self.writer.transport.get_write_buffer_size() > self.max_write_buffer:
+            raise ConnectionError("Cliente não está lendo as mensagens")
+        self.writer.write(data)
+
+    # O transporte envia o que já está no buffer antes de fechar. Com flush=True
+    # a conexão é meio fechada primeiro: fechar de vez com dados do cliente ainda
+    # não lidos faria o sistema descartar o que falta enviar
+    def close(self, flush=False):
+        if self.closed:
+            return
+        self.closed = True
+        if flush and self.writer.can_write_eof():
+            self.writer.write_eof()
+            asyncio.get_running_loop().call_later(CLOSE_GRACE, self.writer.close)
+        else:
+            self.writer.close()
+
+
+# Mesmo protocolo e regras do OthelloServer, mas todas as conexões são
+# atendidas por um único event loop em vez de uma thread por cliente
+class AsyncOthelloServer(OthelloServer):
+    def __init__(self, host='0.0.0.0', port=5000, log_callback=None, bot_time_limit=1.0,
+                 analysis_time_limit=5.0, analysis_max_empties=20, backlog=1024,
+                 max_outbound_bytes=MAX_OUTBOUND_BYTES, rating_bucket_size=DEFAULT_BUCKET_SIZE,
+                 idle_timeout=IDLE_TIMEOUT, game_idle_timeout=GAME_IDLE_TIMEOUT,
+                 reap_interval=REAP_INTERVAL, journal_dir=None, listen=True, max_workers=None):
+        super().__init__(host=host, port=port, log_callback=log_callback,
+                         bot_time_limit=bot_time_limit,
+                         analysis_time_limit=analysis_time_limit,
+                         analysis_max_empties=analysis_max_empties,
+                         backlog=backlog,
+                         max_outbound_bytes=max_outbound_bytes,
+                         rating_bucket_size=rating_bucket_size,
+                         idle_timeout=idle_timeout,
+                         game_idle_timeout=game_idle_timeout,
+                         reap_interval=reap_interval,
+                         journal_dir=journal_dir,
+                         listen=listen)
+        # Dormir travaria o loop inteiro
+        self.game_over_delay = 0
+        # Buscas do computador e análises rodam fora do loop
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        self.connections = set()
+        self.tasks = set()  # Conexões, coletor e buscas retomadas; canceladas no encerramento
+        self.loop = None
+        self.async_server = None
+        self.stopping = None           # asyncio.Event que serve() espera
+        self.finished = threading.Event()
+
+    def start(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception:
+            if self.running:
+                self.log("Erro no loop do servidor", "ERROR")
+
+    # Atende até stop(); sem socket de escuta (worker do supervisor) as conexões
+    # chegam por adopt_connection
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        if self.server is not None:
+            self.async_server = await asyncio.start_server(
+                self.handle_connection, sock=self.server, backlog=self.backlog)
+        if self.reap_interval:
+            self.spawn(self.reap_periodically())
+        await self.stopping.wait()
+        await self.shutdown()
+
+    def spawn(self, coroutine):
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    # Dentro do loop: para de aceitar, fecha as conexões, cancela e espera as
+    # tarefas e só então libera o executor e fecha o diário
+    async def shutdown(self):
+        if self.async_server is not None:
+            self.async_server.close()
+        for connection in list(self.connections):
+            connection.close()
+        tasks = [task for task in self.tasks if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.journal is not None:
+            self.journal.close()
+        self.log("Servidor encerrado")
+        self.finished.set()
+
+    # stream e messages vêm preenchidos quando o supervisor já leu a primeira mensagem
+    async def handle_connection(self, reader, writer, stream=None, messages=()):
+        connection = ClientConnection(writer, self.max_outbound_bytes)
+        self.connections.add(connection)
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        stream = stream or MessageStream()
+        try:
+            enable_keepalive(writer.get_extra_info("socket"))
+            messages = list(messages)
+            while not messages:
+                data = await self.read(reader, self.idle_timeout)
+                if not data:
+                    return
+                messages = stream.feed(data)
+            if messages[0]["type"] == "spectate":
+                # Espectadores só recebem; a leitura serve para detectar a desconexão
+                if self.register_spectator(connection, messages[0], stream) is not None:
+                    timeout = self.idle_timeout if stream.version >= HEARTBEAT_VERSION else None
+                    while await self.read(reader, timeout):
+                        pass
+                return
+            if messages[0]["type"] in QUERY_TYPES:
+                version = self.negotiate_stream_version(stream, messages[0])
+                connection.sendall(self.encode_message(self.handle_query(messages[0]), version))
+                return
+
+            game_id = self.register_player(connection, messages[0], stream)
+            if game_id is None:
+                return
+            messages = messages[1:]
+            # Clientes sem heartbeat podem ficar calados enquanto esperam o adversário
+            timeout = self.idle_timeout if stream.version >= HEARTBEAT_VERSION else None
+
+            while self.running:
+                for msg in messages:
+                    if game_id not in self.games or not await self.dispatch(game_id, connection, msg):
+                        return
+                data = await self.read(reader, timeout)
+                if not data:
+                    break
+                messages = stream.feed(data)
+        except asyncio.CancelledError:
+            pass  # Servidor encerrando: a conexão termina sem rastro no log
+        except Exception as e:
+            print(f"Erro ao processar mensagem: {e}")
+        finally:
+            self.tasks.discard(task)
+            self.connections.discard(connection)
+            self.remove_client(connection)
+
+    # Leitura com limite de inatividade; b"" quando a conexão fecha ou fica calada demais
+    async def read(self, reader, timeout):
+        try:
+            return await asyncio.wait_for(reader.read(RECV_SIZE), timeout)
+        except asyncio.TimeoutError:
+            self.count_reclaimed("idle_connections")
+            return b""
+
+    async def reap_periodically(self):
+        while self.running:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception as e:
+                self.log(f"Erro no coletor de jogos: {e}", "ERROR")
+
+    # Trata uma mensagem do cliente; retorna False quando a conexão deve ser encerrada
+    async def dispatch(self, game_id, connection, msg):
+        game_data = self.games.get(game_id)
+        if game_data is None:
+            return False
+
+        if msg["type"] == "move":
+            # A trava só é mantida enquanto a jogada é aplicada, nunca durante um await
+            with game_data["lock"]:
+                if game_data["closed"]:
+                    return False
+                moved = self.handle_move(game_id, connection, msg)
+                if game_data["closed"]:
+                    return False  # A jogada encerrou o jogo
+            if not moved:
+                return True
+            return await self.play_bot_turns_async(game_id)
+
+        elif msg["type"] == "analysis":
+            with game_data["lock"]:
+                player = self.find_player(game_id, connection)
+                game = self.snapshot_game(game_data)
+            analysis_msg = await self.loop.run_in_executor(self.executor, self.analyze_game, game)
+            connection.sendall(self.encode_message(analysis_msg, player["protocol_version"]))
+            return True
+
+        # Demais mensagens são rápidas e tratadas como no servidor com threads
+        return self.handle_message(game_id, connection, msg)
+
+    # A busca do computador roda no executor, sem travar o loop
+    def resume_bot(self, game_id):
+        self.spawn(self.play_bot_turns_async(game_id))
+
+    # A entrega aos espectadores roda depois, no próprio loop, sem atrasar os jogadores
+    def deliver_to_spectators(self, spectators, encoded):
+        self.loop.call_soon(self.fan_out, spectators, encoded)
+
+    async def play_bot_turns_async(self, game_id):
+        game_data = self.games.get(game_id)
+        if not game_data or not self.claim_bot(game_data):
+            return bool(game_data) and not game_data["closed"]
+        try:
+            while True:
+                with game_data["lock"]:
+                    if game_data["closed"]:
+                        return False
+                    bot = self.bot_to_move(game_data)
+                    if bot is None:
+                        game_data["bot_thinking"] = False
+                        return True
+                    game = self.snapshot_game(game_data)
+
+                move = await self.loop.run_in_executor(
+                    self.executor, bot["engine"].choose_move, game, bot["color"])
+                # O jogo pode ter sido descartado, ou ter mudado, enquanto o computador pensava
+                with game_data["lock"]:
+                    if game_data["closed"]:
+                        return False
+                    if not self.same_position(game_data, game, bot["color"]):
+                        continue
+                    if move is None or not self.process_move(game_id, bot, *move):
+                        return False
+        except BaseException:
+            self.release_bot(game_data)
+            raise
+
+    # O encerramento acontece no loop (shutdown); chamado de outra thread,
+    # stop() espera ele terminar
+    def stop(self):
+        self.running = False
+        if self.finished.is_set():
+            return
+        if self.stopping is None:
+            # O loop nunca começou
+            if self.server is not None:
+                self.server.close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if self.journal is not None:
+                self.journal.close()
+            self.log("Servidor encerrado")
+            self.finished.set()
+            return
+        self.loop.call_soon_threadsafe(self.stopping.set)
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if not in_loop:
+            self.finished.wait(STOP_TIMEOUT)
+
+
+if __name__ == "__main__":
+    server = AsyncOthelloServer(journal_dir=JOURNAL_DIR)
+    server.start()
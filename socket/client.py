@@ -3,7 +3,11 @@ from tkinter import messagebox
 import socket
 import json
 import threading
+import time
 from connection_dialog import ConnectionDialog
+from game_logic import OthelloGame
+from protocol import (MessageStream, encode_message, LEGACY_VERSION, HEARTBEAT_VERSION,
+                      PROTOCOL_VERSION, HEARTBEAT_INTERVAL)
 
 class OthelloClient:
     def __init__(self):
@@ -17,6 +21,8 @@ class OthelloClient:
         self.current_turn = "black"
         self.game_active = False
         self.player_name = None
+        # Versão do protocolo combinada com o servidor na conexão
+        self.protocol_version = LEGACY_VERSION
         
         self.board = [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
         
@@ -74,6 +80,7 @@ class OthelloClient:
         self.message_entry.bind("<Return>", lambda e: self.send_message())
         
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.send_lock = threading.Lock()
         
         self.init_board()
         self.canvas.bind("<Button-1>", self.handle_click)
@@ -170,7 +177,7 @@ class OthelloClient:
                 "row": row,
                 "col": col
             }
-            self.socket.send(json.dumps(msg).encode())
+            self.send_to_server(msg)
     
     def handle_remote_move(self, msg):
         if "no_valid_moves" in msg and msg["no_valid_moves"]:
@@ -275,67 +282,113 @@ class OthelloClient:
         
         self.root.title(status)
     
-    def connect_to_server(self, host='localhost', port=5000, player_name="", game_id="game1"):
+    # Sem game_id o servidor coloca o jogador na fila de pareamento
+    def connect_to_server(self, host='localhost', port=5000, player_name="", game_id=None, vs_bot=False):
         try:
             # Armazena as informações de conexão
             self.host = host
             self.port = port
             self.player_name = player_name
+            self.vs_bot = vs_bot
+            self.game_id = game_id
             
             self.socket.connect((host, port))
             
             msg = {
                 "type": "connect",
-                "game_id": game_id,
-                "player_name": player_name
+                "player_name": player_name,
+                "vs_bot": vs_bot,
+                "protocol_version": PROTOCOL_VERSION
             }
-            self.socket.send(json.dumps(msg).encode())
+            if game_id:
+                msg["game_id"] = game_id
+            else:
+                msg["matchmaking"] = True
+            # A mensagem "connect" vai em JSON simples, que servidores antigos entendem;
+            # a resposta diz se as próximas mensagens usam quadros
+            self.protocol_version = LEGACY_VERSION
+            self.socket.sendall(json.dumps(msg).encode())
             
             threading.Thread(target=self.receive_messages, daemon=True).start()
             
         except Exception as e:
             messagebox.showerror("Erro", f"Não foi possível conectar ao servidor: {e}")
     
+    def send_to_server(self, msg):
+        # A thread de heartbeat também envia: um quadro não pode se misturar com outro
+        with self.send_lock:
+            self.socket.sendall(encode_message(msg, self.protocol_version))
+    
+    # Avisa o servidor de que o cliente continua aqui enquanto o jogador pensa;
+    # termina quando o socket é fechado (ex.: ao reiniciar a partida)
+    def send_heartbeats(self, sock):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            if sock is not self.socket:
+                break
+            try:
+                self.send_to_server({"type": "heartbeat"})
+            except OSError:
+                break
+    
     def receive_messages(self):
-        buffer = ""
+        # O formato das respostas (JSON simples ou quadros) é detectado pelo primeiro byte
+        stream = MessageStream()
         while True:
             try:
-                data = self.socket.recv(1024).decode()
-                if not data:
+                messages = stream.receive(self.socket)
+                if messages is None:
                     break
                 
-                buffer += data
-                
-                try:
-                    # Tenta processar o JSON do buffer
-                    msg = json.loads(buffer)
-                    buffer = ""  # Limpa o buffer após processar com sucesso
-                    
-                    if msg["type"] == "connected":
-                        self.my_color = msg["color"]
-                        self.root.after(0, self.update_status)
-                    
-                    elif msg["type"] == "game_start":
-                        self.game_active = True
-                        self.root.after(0, lambda: messagebox.showinfo("Jogo Iniciado", "O jogo começou!"))
-                    
-                    elif msg["type"] == "move":
-                        self.root.after(0, lambda: self.handle_remote_move(msg))
-                    
-                    elif msg["type"] == "game_over":
-                        self.root.after(0, lambda: self.handle_game_over(msg))
-                    
-                    elif msg["type"] == "chat":
-                        self.root.after(0, lambda: self.display_message(msg["color"], msg["player_name"], msg["message"]))
-                    
-                except json.JSONDecodeError:
-                    # Se não conseguir processar o JSON, mantém os dados no buffer
-                    continue
+                for msg in messages:
+                    self.process_message(msg)
                 
             except Exception as e:
                 print(f"Erro ao receber mensagem: {e}")
                 break
     
+    def process_message(self, msg):
+        if msg["type"] == "connected":
+            self.my_color = msg["color"]
+            self.protocol_version = msg.get("protocol_version", LEGACY_VERSION)
+            if self.protocol_version >= HEARTBEAT_VERSION:
+                threading.Thread(target=self.send_heartbeats, args=(self.socket,), daemon=True).start()
+            self.root.after(0, self.update_status)
+        
+        elif msg["type"] == "game_start":
+            self.game_active = True
+            self.root.after(0, lambda: messagebox.showinfo("Jogo Iniciado", "O jogo começou!"))
+        
+        elif msg["type"] == "state":
+            # Partida retomada depois de um reinício do servidor
+            self.root.after(0, lambda: self.load_state(msg))
+        
+        elif msg["type"] == "move":
+            self.root.after(0, lambda: self.handle_remote_move(msg))
+        
+        elif msg["type"] == "game_over":
+            self.root.after(0, lambda: self.handle_game_over(msg))
+        
+        elif msg["type"] == "chat":
+            self.root.after(0, lambda: self.display_message(msg["color"], msg["player_name"], msg["message"]))
+        
+        elif msg["type"] == "error":
+            # Conexão recusada (ex.: jogo cheio) ou jogo encerrado pelo servidor
+            self.root.after(0, lambda: messagebox.showerror("Erro", msg["message"]))
+    
+    def load_state(self, msg):
+        board = OthelloGame.from_bitboards(msg["black"], msg["white"]).board
+        for row in range(self.board_size):
+            for col in range(self.board_size):
+                if self.board[row][col] is not None:
+                    self.canvas.delete(self.board[row][col])
+                    self.board[row][col] = None
+                if board[row][col]:
+                    self.place_piece(row, col, board[row][col])
+        self.current_turn = msg["current_turn"]
+        self.game_active = msg["current_turn"] is not None
+        self.update_status()
+    
     def handle_game_over(self, msg):
         winner = msg["winner"]
         black_count = msg["black_count"]
@@ -361,6 +414,8 @@ class OthelloClient:
         current_host = self.host if hasattr(self, 'host') else 'localhost'
         current_port = self.port if hasattr(self, 'port') else 5000
         current_name = self.player_name if self.player_name else "Jogador"
+        current_vs_bot = getattr(self, 'vs_bot', False)
+        current_game_id = getattr(self, 'game_id', None)
         
         # Fecha o socket antigo
         try:
@@ -380,7 +435,8 @@ class OthelloClient:
         self.update_status()
         
         # Reconecta ao servidor usando as informações originais
-        self.connect_to_server(host=current_host, port=current_port, player_name=current_name)
+        self.connect_to_server(host=current_host, port=current_port, player_name=current_name,
+                               game_id=current_game_id, vs_bot=current_vs_bot)
     
     def send_message(self):
         mensagem = self.message_entry.get().strip()
@@ -391,7 +447,7 @@ class OthelloClient:
                 "player_name": self.player_name,
                 "message": mensagem
             }
-            self.socket.send(json.dumps(msg).encode())
+            self.send_to_server(msg)
             self.message_entry.delete(0, tk.END)
     
     def display_message(self, color, player_name, mensagem):
@@ -421,8 +477,9 @@ def main():
     connection_info = dialog.show()
     
     if connection_info:
-        host, port, player_name = connection_info
-        client.connect_to_server(host=host, port=port, player_name=player_name)
+        host, port, player_name, vs_bot, game_id = connection_info
+        client.connect_to_server(host=host, port=port, player_name=player_name, game_id=game_id,
+                                 vs_bot=vs_bot)
         client.root.mainloop()
     else:
         client.root.destroy()
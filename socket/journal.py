@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import threading
+from game_logic import OthelloGame, BLACK
+
+# Diretório usado pelo servidor iniciado pela interface ou pela linha de comando
+JOURNAL_DIR = "journal"
+# Tempo máximo que um registro espera em memória antes de ir para o disco
+SYNC_INTERVAL = 0.05
+# Registros entre dois retratos; limita o trecho do diário relido na recuperação
+SNAPSHOT_EVERY = 10000
+# Mensagens de chat guardadas por jogo
+CHAT_HISTORY = 50
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PATTERN = re.compile(r"journal\.(\d+)\.log$")
+
+
+# Maior número nos ids de jogo que combinam com o padrão (ex.: "match(\d+)");
+# os contadores de ids continuam dele em diante depois de uma recuperação
+def highest_id(game_ids, pattern):
+    regex = re.compile(pattern)
+    numbers = [int(match.group(1)) for match in map(regex.fullmatch, game_ids) if match]
+    return max(numbers, default=0)
+
+
+def new_game_state():
+    game = OthelloGame()
+    return {"black": game.black, "white": game.white, "turn": BLACK,
+            "players": [], "chat": [], "surrender": None}
+
+
+# Diário de jogos em disco. Cada jogada aceita, mensagem de chat e evento do
+# ciclo de vida (entrada, saída, desistência, reinício, fim) vira uma linha JSON
+# compacta. As linhas se acumulam em memória e uma thread as grava com um único
+# fsync a cada sync_interval, então quem joga nunca espera pelo disco.
+#
+# O diário mantém um espelho do estado de cada jogo (bitboards, jogadores, chat
+# recente). A cada snapshot_every registros o espelho vira um retrato e o diário
+# passa para um segmento novo; os segmentos anteriores ao retrato são apagados.
+# Na recuperação basta ler o retrato e reaplicar os segmentos seguintes, e as
+# jogadas trazem o tabuleiro resultante, então nada precisa ser recalculado
+class GameJournal:
+    def __init__(self, directory, sync_interval=SYNC_INTERVAL, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.lock = threading.Lock()       # Protege o espelho e as linhas pendentes
+        self.file_lock = threading.Lock()  # Protege o segmento aberto; sempre adquirida antes de lock
+        self.pending = []  # Linhas ainda não gravadas
+        self.games = {}    # Espelho: {game_id: estado}
+        self.since_snapshot = 0
+        self.segment = 0
+        self.file = None
+        self.closed = False
+        self.stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    # Reconstrói os jogos a partir do retrato e do diário e começa um segmento
+    # novo; retorna ({game_id: estado}, registros relidos). Chamado uma vez, antes de start()
+    def recover(self):
+        first = 1
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                snapshot = json.load(f)
+            self.games = snapshot["games"]
+            first = snapshot["segment"]
+
+        records = 0
+        segments = self._segments()
+        for number in segments:
+            if number >= first:
+                records += self._replay(number)
+        self.segment = max(segments + [first - 1])
+
+        # O último segmento pode terminar em uma linha cortada: um retrato novo
+        # deixa o diário limpo antes de qualquer gravação
+        self.snapshot()
+        return {game_id: dict(state) for game_id, state in self.games.items()}, records
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"journal.{number:08d}.log")
+
+    def _replay(self, number):
+        with open(self._segment_path(number)) as f:
+            lines = f.read().splitlines()
+        # Um único json.loads para o segmento inteiro é bem mais rápido que um por linha
+        try:
+            records = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # Linha incompleta de uma gravação interrompida
+        for record in records:
+            self._apply(record)
+        return len(records)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while not self.stopped.wait(self.sync_interval):
+            self.flush()
+            if self.since_snapshot >= self.snapshot_every:
+                self.snapshot()
+
+    # Registra um evento já aplicado em memória pelo servidor. Chamado com a
+    # trava do jogo adquirida, o que mantém a ordem dos eventos de cada jogo
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            self._apply(record)
+            self.pending.append(line)
+            self.since_snapshot += 1
+
+    # Grava as linhas pendentes com um só fsync. A trava do diário só cobre a
+    # troca da lista; escrita e fsync acontecem fora dela, então append() não
+    # espera pelo disco
+    def flush(self):
+        with self.file_lock:
+            with self.lock:
+                lines = self._take_pending()
+            self._write(lines)
+
+    def _take_pending(self):
+        lines, self.pending = self.pending, []
+        return lines
+
+    # Chamado com file_lock adquirida
+    def _write(self, lines):
+        if not lines or self.file is None:
+            return
+        self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    # Grava o espelho como retrato e passa para um segmento novo. A cópia do
+    # espelho e a retirada das linhas pendentes acontecem juntas sob a trava, e
+    # essas linhas vão para o segmento antigo antes da troca, então o retrato
+    # contém exatamente os registros dos segmentos anteriores
+    def snapshot(self):
+        with self.file_lock:
+            if self.closed:
+                return
+            with self.lock:
+                lines = self._take_pending()
+                games = {game_id: dict(state, players=list(state["players"]), chat=list(state["chat"]))
+                         for game_id, state in self.games.items()}
+                self.since_snapshot = 0
+            self._write(lines)
+            if self.file is not None:
+                self.file.close()
+            self.segment += 1
+            self.file = open(self._segment_path(self.segment), "a")
+            segment = self.segment
+
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"segment": segment, "games": games}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        # Só depois do retrato gravado os segmentos antigos deixam de ser necessários
+        for number in self._segments():
+            if number < segment:
+                os.remove(self._segment_path(number))
+
+    def close(self):
+        self.stopped.set()
+        with self.file_lock:
+            self.closed = True
+            with self.lock:
+                lines = self._take_pending()
+            self._write(lines)
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _apply(self, record):
+        event = record["e"]
+        game_id = record["g"]
+        if event == "close":
+            self.games.pop(game_id, None)
+            return
+        state = self.games.get(game_id)
+        if state is None:
+            if event != "join":
+                return  # Jogo encerrado antes do retrato
+            state = self.games[game_id] = new_game_state()
+
+        if event == "join":
+            state["players"] = state["players"] + [[record["n"], record["p"], record.get("bot", False)]]
+        elif event == "leave":
+            state["players"] = [p for p in state["players"] if p[0] != record["n"]]
+        elif event == "move":
+            state["black"] = record["b"]
+            state["white"] = record["w"]
+            state["turn"] = record["t"]
+        elif event == "chat":
+            state["chat"] = (state["chat"] + [[record.get("i"), record["n"], record["p"], record["m"], record.get("ts")]])[-CHAT_HISTORY:]
+        elif event == "surrender":
+            state["turn"] = None
+            state["surrender"] = [record["winner"], record["by"]]
+        elif event == "reset":
+            state.update(new_game_state(), players=state["players"])
@@ -0,0 +1,188 @@
+import json
+import struct
+
+# Versões do protocolo:
+# 1 - objetos JSON enviados um atrás do outro, sem delimitação (clientes antigos)
+# 2 - cada mensagem é um quadro: tamanho em 4 bytes (big-endian) + JSON em UTF-8
+# 3 - quadros como na versão 2; jogadas e estado do tabuleiro em formato binário
+# 4 - como a versão 3; o cliente envia "heartbeat" periodicamente e o servidor
+#     desconecta quem fica calado por mais tempo que o limite de inatividade
+LEGACY_VERSION = 1
+FRAMED_VERSION = 2
+BINARY_VERSION = 3
+HEARTBEAT_VERSION = 4
+PROTOCOL_VERSION = 4
+
+# Intervalo entre heartbeats do cliente, em segundos
+HEARTBEAT_INTERVAL = 15.0
+
+HEADER = struct.Struct("!I")
+
+# Mensagens binárias: o primeiro byte do quadro é o tipo. Quadros JSON começam
+# com '{', então os dois formatos convivem na mesma conexão
+MSG_MOVE = 1
+MSG_STATE = 2
+# Jogada: tipo, casa (linha * 8 + coluna), flags
+MOVE_STRUCT = struct.Struct("!BBB")
+# Estado: tipo, bitboards das pretas e das brancas, vez (0 ninguém, 1 pretas, 2 brancas)
+STATE_STRUCT = struct.Struct("!BQQB")
+
+FLAG_WHITE = 1            # a jogada é das brancas
+FLAG_NEXT_WHITE = 2       # a próxima vez é das brancas
+FLAG_NO_VALID_MOVES = 4   # o adversário passou a vez
+FLAG_COLORS = 8           # a mensagem traz "color" e "next_turn"
+
+MOVE_KEYS = {"type", "row", "col"}
+MOVE_COLOR_KEYS = {"type", "row", "col", "color", "next_turn", "no_valid_moves"}
+STATE_KEYS = {"type", "black", "white", "current_turn"}
+TURN_CODES = {None: 0, "black": 1, "white": 2}
+TURN_NAMES = (None, "black", "white")
+
+# Mensagens maiores que isto indicam um cliente com defeito ou malicioso
+MAX_FRAME_SIZE = 64 * 1024
+RECV_SIZE = 4096
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode_frame(msg):
+    payload = json.dumps(msg, separators=(",", ":")).encode()
+    return HEADER.pack(len(payload)) + payload
+
+
+# Corpo binário da mensagem, ou None se ela só pode ir em JSON
+def encode_binary(msg):
+    kind = msg.get("type")
+    if kind == "move":
+        keys = msg.keys()
+        if keys == MOVE_KEYS:
+            flags = 0
+        elif keys <= MOVE_COLOR_KEYS and "color" in msg and "next_turn" in msg:
+            flags = FLAG_COLORS
+            if msg["color"] == "white":
+                flags |= FLAG_WHITE
+            if msg["next_turn"] == "white":
+                flags |= FLAG_NEXT_WHITE
+            if msg.get("no_valid_moves"):
+                flags |= FLAG_NO_VALID_MOVES
+        else:
+            return None
+        return MOVE_STRUCT.pack(MSG_MOVE, msg["row"] * 8 + msg["col"], flags)
+    if kind == "state" and msg.keys() == STATE_KEYS:
+        return STATE_STRUCT.pack(MSG_STATE, msg["black"], msg["white"], TURN_CODES[msg["current_turn"]])
+    return None
+
+
+def decode_binary(data):
+    kind = data[0]
+    if kind == MSG_MOVE:
+        _, square, flags = MOVE_STRUCT.unpack_from(data)
+        msg = {"type": "move", "row": square >> 3, "col": square & 7}
+        if flags & FLAG_COLORS:
+            msg["color"] = "white" if flags & FLAG_WHITE else "black"
+            msg["next_turn"] = "white" if flags & FLAG_NEXT_WHITE else "black"
+            if flags & FLAG_NO_VALID_MOVES:
+                msg["no_valid_moves"] = True
+        return msg
+    if kind == MSG_STATE:
+        _, black, white, turn = STATE_STRUCT.unpack_from(data)
+        return {"type": "state", "black": black, "white": white, "current_turn": TURN_NAMES[turn]}
+    raise ProtocolError(f"Tipo de mensagem binária desconhecido: {kind}")
+
+
+def encode_message(msg, version=PROTOCOL_VERSION):
+    if version >= BINARY_VERSION:
+        payload = encode_binary(msg)
+        if payload is not None:
+            return HEADER.pack(len(payload)) + payload
+    if version >= FRAMED_VERSION:
+        return encode_frame(msg)
+    return json.dumps(msg).encode()
+
+
+# Versão combinada a partir da mensagem "connect" do cliente
+def negotiate_version(msg):
+    return max(LEGACY_VERSION, min(int(msg.get("protocol_version", LEGACY_VERSION)), PROTOCOL_VERSION))
+
+
+# Decodificador incremental: acumula os bytes recebidos e devolve, de uma vez,
+# todas as mensagens completas do buffer. Com version=None a versão é
+# detectada pelo primeiro byte ('{' no protocolo antigo)
+class MessageStream:
+    def __init__(self, version=None, max_frame_size=MAX_FRAME_SIZE):
+        self.version = version
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray()
+        self.chunk = bytearray(RECV_SIZE)
+        self.chunk_view = memoryview(self.chunk)
+        self.json_decoder = json.JSONDecoder()
+
+    # Lê do socket direto para o buffer pré-alocado; None quando a conexão fecha
+    def receive(self, sock):
+        size = sock.recv_into(self.chunk)
+        if not size:
+            return None
+        return self.feed(self.chunk_view[:size])
+
+    def feed(self, data):
+        self.buffer += data
+        if not self.buffer:
+            return []
+        if self.version is None:
+            self.version = LEGACY_VERSION if self.buffer[0] == ord("{") else FRAMED_VERSION
+        if self.version >= FRAMED_VERSION:
+            return self._read_frames()
+        return self._read_json()
+
+    def _read_frames(self):
+        messages = []
+        offset = 0
+        view = memoryview(self.buffer)
+        try:
+            size = len(view)
+            while size - offset >= HEADER.size:
+                (length,) = HEADER.unpack_from(view, offset)
+                if length > self.max_frame_size:
+                    raise ProtocolError(f"Quadro de {length} bytes excede o limite de {self.max_frame_size}")
+                start = offset + HEADER.size
+                end = start + length
+                if end > size:
+                    break
+                # Decodifica direto da memória do buffer, sem copiar o quadro
+                if length and view[start] != ord("{"):
+                    messages.append(decode_binary(view[start:end]))
+                else:
+                    messages.append(json.loads(str(view[start:end], "utf-8")))
+                offset = end
+        finally:
+            view.release()
+        if offset:
+            del self.buffer[:offset]
+        return messages
+
+    def _read_json(self):
+        messages = []
+        try:
+            text = self.buffer.decode()
+        except UnicodeDecodeError as e:
+            # Caractere incompleto no fim do buffer: espera o resto
+            text = self.buffer[:e.start].decode()
+        position = 0
+        while True:
+            while position < len(text) and text[position].isspace():
+                position += 1
+            if position >= len(text):
+                break
+            try:
+                msg, position = self.json_decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                # Mensagem incompleta: mantém os dados no buffer
+                break
+            messages.append(msg)
+        if position:
+            del self.buffer[:len(text[:position].encode())]
+        if len(self.buffer) > self.max_frame_size:
+            raise ProtocolError("Dados sem uma mensagem JSON válida")
+        return messages
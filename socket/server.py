@@ -1,22 +1,347 @@
 import socket
 import threading
-import json
-from game_logic import OthelloGame
+import selectors
+from collections import deque, Counter
+from game_logic import OthelloGame, color_name, BLACK, WHITE
+from engine import OthelloEngine
+from solver import EndgameSolver, SolverTimeout
+from game_registry import GameRegistry
+from lobby import Lobby, DEFAULT_BUCKET_SIZE
+from journal import GameJournal, highest_id, JOURNAL_DIR
+from protocol import (MessageStream, LEGACY_VERSION, FRAMED_VERSION, HEARTBEAT_VERSION,
+                      PROTOCOL_VERSION, negotiate_version)
+import protocol
+import itertools
 import time
 
+# Campos das mensagens que levam uma cor; no protocolo as cores são "black"/"white"
+COLOR_FIELDS = ("color", "next_turn", "current_turn")
+
+# Bytes aguardando envio por conexão; acima disso o cliente é considerado lento
+MAX_OUTBOUND_BYTES = 256 * 1024
+# O que fazer com um cliente lento: "disconnect" encerra a conexão na hora;
+# "block" faz quem envia esperar até SEND_TIMEOUT segundos antes de desconectar
+SLOW_CONSUMER_POLICIES = ("disconnect", "block")
+SEND_TIMEOUT = 5.0
+
+# Máximo de jogos por página em "list_games"
+MAX_LIST_LIMIT = 100
+# Mensagens respondidas na hora, sem entrar em um jogo
+QUERY_TYPES = ("list_games", "server_stats")
+
+# Conexões que enviam heartbeat (protocolo 4) e ficam caladas por mais que isto
+# são encerradas; o mesmo vale para quem conecta e não envia a primeira mensagem
+IDLE_TIMEOUT = 60.0
+# Jogos sem nenhuma jogada por este tempo são descartados pelo coletor
+GAME_IDLE_TIMEOUT = 30 * 60.0
+# Intervalo entre as passagens do coletor
+REAP_INTERVAL = 30.0
+
+# Keepalive do TCP: derruba conexões meio abertas mesmo de clientes sem heartbeat
+def enable_keepalive(sock, idle=60, interval=10, count=5):
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Ajustes finos só existem em alguns sistemas
+    for option, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+# Conexão com fila de saída própria: sendall só enfileira e uma thread escritora
+# envia tudo o que estiver pendente de uma vez, então um cliente lento não
+# atrasa quem está enviando a mensagem
+class OutboundConnection:
+    def __init__(self, sock, max_pending_bytes=MAX_OUTBOUND_BYTES, policy="disconnect",
+                 send_timeout=SEND_TIMEOUT):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Política desconhecida: {policy}")
+        self.sock = sock
+        self.max_pending_bytes = max_pending_bytes
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.condition = threading.Condition()
+        self.closing = False
+        self.closed = False
+        threading.Thread(target=self.drain, daemon=True).start()
+
+    def recv_into(self, buffer):
+        try:
+            return self.sock.recv_into(buffer)
+        except OSError:
+            # Fechada por outra thread (fim de jogo, coletor): equivale a desconectar
+            if self.closed:
+                return 0
+            raise
+
+    def sendall(self, data):
+        with self.condition:
+            if self.closing:
+                raise ConnectionError("Conexão encerrada")
+            if self.pending_bytes + len(data) > self.max_pending_bytes:
+                if self.policy == "disconnect":
+                    raise ConnectionError("Cliente não está lendo as mensagens")
+                has_room = self.condition.wait_for(
+                    lambda: self.closing or self.pending_bytes + len(data) <= self.max_pending_bytes,
+                    timeout=self.send_timeout)
+                if self.closing or not has_room:
+                    raise ConnectionError("Cliente não está lendo as mensagens")
+            self.pending.append(data)
+            self.pending_bytes += len(data)
+            self.condition.notify_all()
+
+    def drain(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closing)
+                if not self.pending:
+                    break
+                # Junta as mensagens pendentes em uma única escrita
+                data = b"".join(self.pending)
+                self.pending.clear()
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                self.close()
+                return
+            with self.condition:
+                self.pending_bytes -= len(data)
+                self.condition.notify_all()
+        self._close_socket()
+
+    # Com flush=True o que já está na fila ainda é enviado antes de fechar
+    def close(self, flush=False):
+        with self.condition:
+            self.closing = True
+            if not flush:
+                self.pending.clear()
+            self.condition.notify_all()
+        if not flush:
+            self._close_socket()
+
+    def _close_socket(self):
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+# Conexão de um espectador: sem threads próprias, quem lê e escreve no socket
+# é a SpectatorHub
+class SpectatorConnection:
+    def __init__(self, sock, hub):
+        self.sock = sock
+        self.hub = hub
+        self.backlog = bytearray()
+        self.closing = False
+        self.closed = False
+        # Só espectadores que enviam heartbeat são desconectados por inatividade
+        self.heartbeats = False
+        self.last_seen = time.monotonic()
+
+    def sendall(self, data):
+        if self.closing or self.closed:
+            raise ConnectionError("Conexão encerrada")
+        self.hub.submit(("send", self, data))
+
+    def close(self, flush=False):
+        self.hub.submit(("close", self, flush))
+
+# Uma única thread entrega as mensagens a todos os espectadores, com sockets
+# não bloqueantes e um selector. Os jogadores só enfileiram uma tarefa com os
+# bytes já codificados, então o número de espectadores não afeta a latência deles
+class SpectatorHub:
+    def __init__(self, max_pending_bytes, on_disconnect, idle_timeout=IDLE_TIMEOUT):
+        self.max_pending_bytes = max_pending_bytes
+        self.on_disconnect = on_disconnect
+        self.idle_timeout = idle_timeout
+        self.idle_dropped = 0
+        self.jobs = deque()
+        self.lock = threading.Lock()
+        self.selector = None
+        self.wake_reader = None
+        self.wake_writer = None
+
+    def start(self):
+        with self.lock:
+            if self.selector is not None:
+                return
+            self.selector = selectors.DefaultSelector()
+            self.wake_reader, self.wake_writer = socket.socketpair()
+            self.wake_reader.setblocking(False)
+            self.wake_writer.setblocking(False)
+            self.selector.register(self.wake_reader, selectors.EVENT_READ, None)
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def attach(self, sock):
+        self.start()
+        connection = SpectatorConnection(sock, self)
+        self.submit(("attach", connection, None))
+        return connection
+
+    def publish(self, spectators, encoded):
+        self.submit(("publish", spectators, encoded))
+
+    def submit(self, job):
+        self.jobs.append(job)
+        try:
+            self.wake_writer.send(b"\0")
+        except OSError:
+            pass  # O buffer de aviso já está cheio: a thread vai acordar de qualquer forma
+
+    def run(self):
+        # Sem limite de inatividade a thread só acorda com eventos
+        check_interval = self.idle_timeout / 4 if self.idle_timeout else None
+        next_check = time.monotonic() + (check_interval or 0)
+        while True:
+            for key, events in self.selector.select(check_interval):
+                connection = key.data
+                if connection is None:
+                    try:
+                        while self.wake_reader.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                if events & selectors.EVENT_READ:
+                    # Espectadores não enviam nada; ler serve para detectar a desconexão
+                    try:
+                        data = connection.sock.recv(4096)
+                    except BlockingIOError:
+                        data = b"-"
+                    except OSError:
+                        data = b""
+                    if not data:
+                        self.drop(connection)
+                        continue
+                    connection.last_seen = time.monotonic()
+                if events & selectors.EVENT_WRITE:
+                    self.flush(connection)
+
+            while self.jobs:
+                kind, connection, payload = self.jobs.popleft()
+                if kind == "attach":
+                    connection.sock.setblocking(False)
+                    self.selector.register(connection.sock, selectors.EVENT_READ, connection)
+                elif kind == "publish":
+                    for spectator in connection:
+                        target = spectator["socket"]
+                        if not target.closed:
+                            target.backlog += payload[spectator["protocol_version"]]
+                            self.flush(target)
+                elif kind == "send":
+                    if not connection.closed:
+                        connection.backlog += payload
+                        self.flush(connection)
+                elif kind == "close":
+                    if payload and connection.backlog and not connection.closed:
+                        connection.closing = True
+                    else:
+                        self.close_now(connection)
+
+            if check_interval and time.monotonic() >= next_check:
+                next_check = time.monotonic() + check_interval
+                self.drop_idle()
+
+    def drop_idle(self):
+        deadline = time.monotonic() - self.idle_timeout
+        for key in list(self.selector.get_map().values()):
+            connection = key.data
+            if connection is not None and connection.heartbeats and connection.last_seen < deadline:
+                self.idle_dropped += 1
+                self.drop(connection)
+
+    def flush(self, connection):
+        if connection.closed:
+            return
+        if connection.backlog:
+            try:
+                sent = connection.sock.send(connection.backlog)
+                del connection.backlog[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                self.drop(connection)
+                return
+        if len(connection.backlog) > self.max_pending_bytes:
+            self.drop(connection)
+            return
+        if connection.backlog:
+            self.selector.modify(connection.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, connection)
+        else:
+            self.selector.modify(connection.sock, selectors.EVENT_READ, connection)
+            if connection.closing:
+                self.close_now(connection)
+
+    def drop(self, connection):
+        self.close_now(connection)
+        self.on_disconnect(connection)
+
+    def close_now(self, connection):
+        if connection.closed:
+            return
+        connection.closed = True
+        connection.backlog.clear()
+        try:
+            self.selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        connection.sock.close()
+
 class OthelloServer:
-    def __init__(self, host='0.0.0.0', port=5000, log_callback=None):
+    def __init__(self, host='0.0.0.0', port=5000, log_callback=None, bot_time_limit=1.0,
+                 analysis_time_limit=5.0, analysis_max_empties=20, backlog=128,
+                 max_outbound_bytes=MAX_OUTBOUND_BYTES, slow_consumer_policy="disconnect",
+                 rating_bucket_size=DEFAULT_BUCKET_SIZE, idle_timeout=IDLE_TIMEOUT,
+                 game_idle_timeout=GAME_IDLE_TIMEOUT, reap_interval=REAP_INTERVAL,
+                 journal_dir=None, listen=True):
         self.host = host
         self.port = port
         self.log_callback = log_callback
         self.running = True
+        self.bot_time_limit = bot_time_limit  # Tempo máximo por jogada do computador
+        self.bot_game_counter = itertools.count(1)
+        # Limites da análise exata de final de jogo
+        self.analysis_time_limit = analysis_time_limit
+        self.analysis_max_empties = analysis_max_empties
+        # Pausa antes do fim de jogo, para o cliente processar a última jogada
+        self.game_over_delay = 0.1
+        # Fila de saída de cada conexão e o que fazer quando ela enche
+        self.max_outbound_bytes = max_outbound_bytes
+        self.slow_consumer_policy = slow_consumer_policy
+        # Inatividade: conexões caladas e jogos abandonados
+        self.idle_timeout = idle_timeout
+        self.game_idle_timeout = game_idle_timeout
+        self.reap_interval = reap_interval
+        self.reclaimed = Counter()  # O que o coletor e os limites de inatividade liberaram
+        self.stats_lock = threading.Lock()
+        
+        self.backlog = backlog
+        # Sem listen o servidor só atende conexões repassadas pelo supervisor (supervisor.py)
+        self.server = None
+        if listen:
+            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind((host, port))
+            self.server.listen(backlog)
+        
+        # Jogos em fatias com uma trava por jogo; indexa também conexão -> jogo
+        self.games = GameRegistry()
+        # Fila de quem conecta sem game_id, pareado por faixa de rating
+        self.lobby = Lobby(rating_bucket_size)
         
-        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server.bind((host, port))
-        self.server.listen(2)
+        # Entrega aos espectadores fora da thread de quem jogou
+        self.spectator_hub = SpectatorHub(max_outbound_bytes, self.remove_client, idle_timeout)
         
-        self.games = {}
+        # Diário em disco: as partidas sobrevivem a um reinício do servidor
+        self.journal = None
+        if journal_dir:
+            self.journal = GameJournal(journal_dir)
+            self.recover_games()
+            self.journal.start()
         
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -32,7 +357,48 @@ class OthelloServer:
         else:
             print(f"[{message_type}] {message}")
 
+    # Reconstrói os jogos do diário; os jogadores voltam desconectados e
+    # retomam a partida ao conectar de novo com o mesmo nome e game_id
+    def recover_games(self):
+        started = time.perf_counter()
+        states, records = self.journal.recover()
+        for game_id, state in states.items():
+            if state["turn"] is None:
+                # Terminou antes da queda, sem chegar a ser encerrado
+                self.record(game_id, "close")
+                continue
+            self.games.get_or_create(game_id, lambda: self.restore_game(state))
+        
+        # Ids novos não podem repetir os dos jogos recuperados
+        self.bot_game_counter = itertools.count(highest_id(states, r".*-bot(\d+)") + 1)
+        self.lobby.counter = itertools.count(highest_id(states, self.lobby.prefix + r"(\d+)") + 1)
+        self.log(f"Diário: {len(self.games)} jogo(s) recuperado(s) e {records} registro(s) "
+                 f"relidos em {time.perf_counter() - started:.2f}s")
+    
+    def restore_game(self, state):
+        game_data = self.new_game()
+        game_data["game"] = OthelloGame.from_bitboards(state["black"], state["white"], state["turn"])
+        game_data["current_turn"] = state["turn"]
+        for name, color, bot in state["players"]:
+            if bot:
+                game_data["players"].append(self.create_bot_player(color))
+            else:
+                game_data["players"].append({
+                    "socket": None,
+                    "color": color,
+                    "name": name,
+                    "protocol_version": None
+                })
+        return game_data
+    
+    # Registra o evento no diário; chamado com a trava do jogo adquirida
+    def record(self, game_id, event, **fields):
+        if self.journal is not None:
+            self.journal.append({"e": event, "g": game_id, **fields})
+    
     def start(self):
+        if self.reap_interval:
+            threading.Thread(target=self.reap_loop, daemon=True).start()
         while self.running:
             try:
                 client_socket, address = self.server.accept()
@@ -42,196 +408,730 @@ class OthelloServer:
                     self.log("Erro ao aceitar conexão", "ERROR")
                 break
 
-    def handle_client(self, client_socket, address):
+    # stream e messages vêm preenchidos quando o supervisor já leu a primeira mensagem
+    def handle_client(self, client_socket, address, stream=None, messages=()):
+        connection = None
         try:
-            data = client_socket.recv(1024).decode()
-            msg = json.loads(data)
+            enable_keepalive(client_socket)
+            # Uma conexão que nunca fala também prenderia esta thread
+            client_socket.settimeout(self.idle_timeout)
+            stream = stream or MessageStream()
+            messages = list(messages)
+            while not messages:
+                messages = stream.receive(client_socket)
+                if messages is None:
+                    client_socket.close()
+                    return
             
-            if msg["type"] == "connect":
-                player_name = msg.get("player_name", "Jogador")
-                self.log(f"Jogador '{player_name}' conectou-se ao servidor")
-                game_id = msg.get("game_id", "game1")
-                
-                if game_id not in self.games:
-                    self.games[game_id] = {
-                        "game": OthelloGame(),
-                        "players": [],
-                        "current_turn": "black"
-                    }
-                
-                game_data = self.games[game_id]
-                
-                if len(game_data["players"]) < 2:
-                    # Atribui cor ao jogador
-                    color = "black" if not game_data["players"] else "white"
-                    
-                    # Adiciona o jogador ao jogo
-                    game_data["players"].append({
-                        "socket": client_socket,
-                        "color": color,
-                        "name": player_name
-                    })
-                    
-                    # Envia confirmação de conexão
-                    connect_msg = {
-                        "type": "connected",
-                        "color": color
-                    }
-                    client_socket.send(json.dumps(connect_msg).encode())
-                    
-                    # Se dois jogadores conectados, inicia o jogo
-                    if len(game_data["players"]) == 2:
-                        self.broadcast_game_start(game_id)
-                    
-                    # Inicia thread para processar mensagens do cliente
-                    threading.Thread(target=self.handle_game_messages, 
-                                   args=(game_id, client_socket),
-                                   daemon=True).start()
+            if messages[0]["type"] == "spectate":
+                connection = self.spectator_hub.attach(client_socket)
+                if self.register_spectator(connection, messages[0], stream) is not None:
+                    connection.heartbeats = stream.version >= HEARTBEAT_VERSION
+                return
             
+            if messages[0]["type"] in QUERY_TYPES:
+                # Consulta avulsa: responde e encerra a conexão
+                version = self.negotiate_stream_version(stream, messages[0])
+                client_socket.sendall(self.encode_message(self.handle_query(messages[0]), version))
+                client_socket.close()
+                return
+            
+            connection = OutboundConnection(client_socket, self.max_outbound_bytes,
+                                            self.slow_consumer_policy)
+            game_id = self.register_player(connection, messages[0], stream)
+            if game_id is not None:
+                # Clientes sem heartbeat podem ficar calados enquanto esperam o adversário
+                if stream.version < HEARTBEAT_VERSION:
+                    client_socket.settimeout(None)
+                # Inicia thread para processar mensagens do cliente
+                threading.Thread(target=self.handle_game_messages, 
+                               args=(game_id, connection, stream, messages[1:]),
+                               daemon=True).start()
+            
+        except socket.timeout:
+            self.drop_idle_connection(connection or client_socket)
         except Exception as e:
             print(f"Erro ao processar conexão: {e}")
-            self.remove_client(client_socket)
+            self.remove_client(connection or client_socket)
     
-    def handle_game_messages(self, game_id, client_socket):
-        game_data = self.games[game_id]
+    # Clientes novos pedem a versão na primeira mensagem (ainda em JSON simples)
+    # e passam a usar quadros depois da resposta; quem já envia quadros usa pelo menos a versão 2
+    def negotiate_stream_version(self, stream, msg):
+        version = negotiate_version(msg)
+        if stream.version != LEGACY_VERSION:
+            version = max(version, FRAMED_VERSION)
+        stream.version = version
+        return version
+    
+    # Coloca o jogador em um jogo a partir da mensagem "connect"; retorna o id
+    # do jogo ou None se a conexão foi recusada (e já avisada e encerrada)
+    def register_player(self, client_socket, msg, stream):
+        version = self.negotiate_stream_version(stream, msg)
+        if msg["type"] != "connect":
+            return self.reject_player(client_socket, version, "Mensagem inicial inválida")
+        
+        player_name = msg.get("player_name", "Jogador")
+        self.log(f"Jogador '{player_name}' conectou-se ao servidor")
+        game_id = msg.get("game_id", "game1")
+        vs_bot = msg.get("vs_bot", False)
+        
+        if vs_bot:
+            # Partidas contra o computador sempre têm um jogo próprio
+            game_id = f"{game_id}-bot{next(self.bot_game_counter)}"
+        elif msg.get("matchmaking"):
+            # Sem jogo combinado: o lobby pareia com quem já está esperando
+            game_id = self.lobby.place(msg)
+        elif self.lobby.owns(game_id):
+            # Jogos do lobby só aceitam pelo game_id quem retoma um lugar recuperado do diário
+            return self.resume_lobby_game(client_socket, game_id, player_name, version)
+        
+        game_data = self.lock_open_game(game_id)
+        try:
+            joined = self.join_game(game_id, game_data, client_socket, player_name, version, vs_bot)
+            if joined is not None:
+                self.requeue_lone_player(game_id, game_data, msg.get("rating"))
+        finally:
+            game_data["lock"].release()
+        if joined is None:
+            return self.reject_player(client_socket, version, "Jogo cheio")
+        return joined
+    
+    def resume_lobby_game(self, client_socket, game_id, player_name, version):
+        game_data = self.games.get(game_id)
+        if game_data is not None:
+            with game_data["lock"]:
+                player = None if game_data["closed"] else self.recovered_seat(game_data, player_name)
+                if player is not None:
+                    self.resume_player(game_id, game_data, player, client_socket, version)
+                    self.requeue_lone_player(game_id, game_data)
+                    return game_id
+        return self.reject_player(client_socket, version, "Jogo reservado ao pareamento")
+    
+    # Um jogo do lobby com um só jogador não está mais na fila quando quem esperava
+    # saiu depois do pareamento ou quando o jogo voltou do diário: ele volta para
+    # a fila, senão ninguém mais chegaria nele. Chamado com a trava do jogo adquirida
+    def requeue_lone_player(self, game_id, game_data, rating=None):
+        if (self.lobby.owns(game_id) and len(game_data["players"]) == 1
+                and not self.lobby.is_waiting(game_id)):
+            self.lobby.requeue(game_id, rating)
+    
+    def new_game(self):
+        return {
+            "game": OthelloGame(),
+            "players": [],
+            "spectators": [],
+            "current_turn": BLACK,
+            "closed": False,
+            "last_activity": time.monotonic()
+        }
+    
+    # Retorna o jogo com a trava já adquirida. Um jogo que terminou enquanto
+    # esperávamos a trava já saiu do registro, então um novo é criado no lugar
+    def lock_open_game(self, game_id):
+        while True:
+            game_data = self.games.get_or_create(game_id, self.new_game)
+            game_data["lock"].acquire()
+            if not game_data["closed"]:
+                return game_data
+            game_data["lock"].release()
+    
+    # Chamado com a trava do jogo adquirida
+    def join_game(self, game_id, game_data, client_socket, player_name, version, vs_bot):
+        # Jogador de uma partida recuperada do diário voltando ao seu lugar
+        player = self.recovered_seat(game_data, player_name)
+        if player is not None:
+            return self.resume_player(game_id, game_data, player, client_socket, version)
+        
+        if len(game_data["players"]) >= 2:
+            return None
+        game_data["last_activity"] = time.monotonic()
+        
+        # Atribui cor ao jogador
+        color = BLACK if not game_data["players"] else WHITE
+        
+        # Adiciona o jogador ao jogo
+        game_data["players"].append({
+            "socket": client_socket,
+            "color": color,
+            "name": player_name,
+            "protocol_version": version
+        })
+        self.games.bind(client_socket, game_id)
+        self.record(game_id, "join", n=player_name, p=color)
+        
+        if vs_bot:
+            game_data["players"].append(self.create_bot_player(WHITE))
+            self.record(game_id, "join", n="Computador", p=WHITE, bot=True)
+        
+        # Envia confirmação de conexão
+        connect_msg = {
+            "type": "connected",
+            "color": color,
+            "game_id": game_id,
+            "protocol_version": version
+        }
+        client_socket.sendall(self.encode_message(connect_msg, version))
+        
+        # Se dois jogadores conectados, inicia o jogo
+        if len(game_data["players"]) == 2:
+            self.broadcast_game_start(game_id)
+        return game_id
+    
+    def recovered_seat(self, game_data, player_name):
+        return next((p for p in game_data["players"] if p["socket"] is None
+                     and not p.get("engine") and p["name"] == player_name), None)
+    
+    # Devolve a conexão ao jogador e envia a posição atual no lugar do "game_start";
+    # chamado com a trava do jogo adquirida
+    def resume_player(self, game_id, game_data, player, client_socket, version):
+        player["socket"] = client_socket
+        player["protocol_version"] = version
+        game_data["last_activity"] = time.monotonic()
+        self.games.bind(client_socket, game_id)
+        self.log(f"Jogador '{player['name']}' retomou o jogo {game_id}")
+        
         game = game_data["game"]
+        connect_msg = {
+            "type": "connected",
+            "color": player["color"],
+            "game_id": game_id,
+            "protocol_version": version,
+            "resumed": True
+        }
+        state_msg = {
+            "type": "state",
+            "black": game.black,
+            "white": game.white,
+            "current_turn": game_data["current_turn"]
+        }
+        client_socket.sendall(self.encode_message(connect_msg, version)
+                              + self.encode_message(state_msg, version))
+        self.resume_bot(game_id)
+        return game_id
+    
+    # O computador pode ter ficado devendo a resposta à última jogada antes da queda.
+    # Chamado com a trava do jogo adquirida, então a busca segue em outra thread
+    def resume_bot(self, game_id):
+        threading.Thread(target=self.play_bot_turns, args=(game_id,), daemon=True).start()
+    
+    # Adiciona um observador somente leitura a um jogo existente. Ele recebe um
+    # retrato da partida e depois as mesmas mensagens que os jogadores
+    def register_spectator(self, client_socket, msg, stream):
+        version = self.negotiate_stream_version(stream, msg)
+        game_id = msg.get("game_id", "game1")
+        game_data = self.games.get(game_id)
+        if game_data is None:
+            return self.reject_spectator(client_socket, version)
         
+        # Retrato e inscrição sob a trava do jogo: nenhuma jogada fica de fora
+        with game_data["lock"]:
+            if game_data["closed"]:
+                return self.reject_spectator(client_socket, version)
+            game = game_data["game"]
+            spectating_msg = {
+                "type": "spectating",
+                "game_id": game_id,
+                "protocol_version": version,
+                "current_turn": game_data["current_turn"],
+                "players": [{"name": p["name"], "color": color_name(p["color"])} for p in game_data["players"]],
+                "spectators": len(game_data["spectators"]) + 1
+            }
+            state_msg = {
+                "type": "state",
+                "black": game.black,
+                "white": game.white,
+                "current_turn": game_data["current_turn"]
+            }
+            client_socket.sendall(self.encode_message(spectating_msg, version)
+                                  + self.encode_message(state_msg, version))
+            game_data["spectators"].append({
+                "socket": client_socket,
+                "name": msg.get("player_name", "Espectador"),
+                "protocol_version": version
+            })
+            self.games.bind(client_socket, game_id)
+        return game_id
+    
+    # O aviso ainda é enviado antes de fechar; fechar também encerra a thread de escrita
+    def reject_player(self, client_socket, version, message):
+        self.log(f"Conexão recusada: {message}")
+        error_msg = {"type": "error", "message": message}
+        client_socket.sendall(self.encode_message(error_msg, version))
+        client_socket.close(flush=True)
+        return None
+    
+    def reject_spectator(self, client_socket, version):
+        error_msg = {"type": "error", "message": "Jogo não encontrado"}
+        client_socket.sendall(self.encode_message(error_msg, version))
+        client_socket.close(flush=True)
+        return None
+    
+    def handle_query(self, msg):
+        if msg["type"] == "list_games":
+            return self.list_games(msg)
+        return self.server_stats()
+    
+    def server_stats(self):
+        with self.stats_lock:
+            reclaimed = dict(self.reclaimed)
+        reclaimed["idle_spectators"] = self.spectator_hub.idle_dropped
+        return {
+            "type": "server_stats",
+            "games": len(self.games),
+            "lobby_waiting": len(self.lobby),
+            "threads": threading.active_count(),
+            "reclaimed": reclaimed
+        }
+    
+    def count_reclaimed(self, kind, amount=1):
+        with self.stats_lock:
+            self.reclaimed[kind] += amount
+    
+    # Conexão calada além do limite: tratada como desconexão
+    def drop_idle_connection(self, client_socket):
+        self.count_reclaimed("idle_connections")
+        self.remove_client(client_socket)
+    
+    # Página da lista de jogos: {"offset": 0, "limit": 20} na mensagem
+    def list_games(self, msg):
+        offset = max(0, int(msg.get("offset", 0)))
+        limit = min(max(1, int(msg.get("limit", 20))), MAX_LIST_LIMIT)
+        items, total = self.games.page(offset, limit)
+        games = []
+        for game_id, game_data in items:
+            with game_data["lock"]:
+                players = game_data["players"]
+                games.append({
+                    "game_id": game_id,
+                    "players": [p["name"] for p in players],
+                    "spectators": len(game_data["spectators"]),
+                    "status": "playing" if len(players) == 2 else "waiting",
+                    "vs_bot": any(p.get("engine") for p in players)
+                })
+        return {
+            "type": "games",
+            "games": games,
+            "offset": offset,
+            "limit": limit,
+            "total": total
+        }
+    
+    def create_bot_player(self, color):
+        return {
+            "socket": None,
+            "color": color,
+            "name": "Computador",
+            "engine": OthelloEngine(time_limit=self.bot_time_limit)
+        }
+    
+    def handle_game_messages(self, game_id, client_socket, stream, messages=()):
         while True:
             try:
-                data = client_socket.recv(1024).decode()
-                if not data:
-                    break
+                for msg in messages:
+                    if not self.handle_message(game_id, client_socket, msg):
+                        # Fim de jogo: envia o que falta e encerra a conexão
+                        client_socket.close(flush=True)
+                        return
                 
-                msg = json.loads(data)
-                
-                if msg["type"] == "move":
-                    player = next(p for p in game_data["players"] if p["socket"] == client_socket)
-                    
-                    if player["color"] == game_data["current_turn"]:
-                        row, col = msg["row"], msg["col"]
-                        
-                        if game.is_valid_move(row, col, player["color"]):
-                            # Faz o movimento
-                            game.make_move(row, col, player["color"])
-                            next_color = "white" if player["color"] == "black" else "black"
-                            
-                            # Envia o movimento para todos
-                            move_msg = {
-                                "type": "move",
-                                "row": row,
-                                "col": col,
-                                "color": player["color"],
-                                "next_turn": next_color
-                            }
-                            self.broadcast_to_game(game_id, move_msg)
-                            
-                            # Verifica movimentos válidos para o próximo jogador
-                            has_valid_moves = False
-                            for r in range(game.board_size):
-                                for c in range(game.board_size):
-                                    if game.board[r][c] is None and game.is_valid_move(r, c, next_color):
-                                        has_valid_moves = True
-                                        break
-                                if has_valid_moves:
-                                    break
-                            
-                            if not has_valid_moves:
-                                # Verifica se o jogador atual ainda tem movimentos
-                                current_has_moves = False
-                                for r in range(game.board_size):
-                                    for c in range(game.board_size):
-                                        if game.board[r][c] is None and game.is_valid_move(r, c, player["color"]):
-                                            current_has_moves = True
-                                            break
-                                    if current_has_moves:
-                                        break
-                                
-                                if current_has_moves:
-                                    next_color = player["color"]  # Mantém o mesmo jogador
-                                    # Envia mensagem informando que não há movimentos válidos
-                                    no_moves_msg = {
-                                        "type": "move",
-                                        "row": row,
-                                        "col": col,
-                                        "color": player["color"],
-                                        "next_turn": next_color,
-                                        "no_valid_moves": True
-                                    }
-                                    self.broadcast_to_game(game_id, no_moves_msg)
-                                else:
-                                    # Fim do jogo - nenhum jogador pode mover
-                                    time.sleep(0.1)
-                                    self.handle_game_over(game_id)
-                                    return
-                            
-                            game_data["current_turn"] = next_color
-                            
-                            ## Envia mensagem do sistema informando o próximo jogador
-                            #next_player = next(p for p in game_data["players"] if p["color"] == next_color)
-                            #system_msg = {
-                            #    "type": "chat",
-                            #    "color": "system",
-                            #    "player_name": "Sistema",
-                            #    "message": f"Vez do jogador {next_player['name']} (Peças {'Pretas' if next_color == 'black' else 'Brancas'})"
-                            #}
-                            #self.broadcast_to_game(game_id, system_msg)
-                
-                elif msg["type"] == "chat":
-                    player = next(p for p in game_data["players"] if p["socket"] == client_socket)
-                    chat_msg = {
-                        "type": "chat",
-                        "color": player["color"],
-                        "player_name": msg["player_name"],
-                        "message": msg["message"]
-                    }
-                    self.broadcast_to_game(game_id, chat_msg)
+                messages = stream.receive(client_socket)
+                if messages is None:
+                    self.remove_client(client_socket)
+                    break
             
+            except socket.timeout:
+                self.drop_idle_connection(client_socket)
+                break
             except Exception as e:
                 print(f"Erro ao processar mensagem: {e}")
                 self.remove_client(client_socket)
                 break
     
+    # Trata uma mensagem do cliente; retorna False quando o jogo termina
+    def handle_message(self, game_id, client_socket, msg):
+        game_data = self.games.get(game_id)
+        if game_data is None:
+            return False
+        
+        if msg["type"] == "heartbeat":
+            # Basta ter chegado: a leitura já renovou o limite de inatividade
+            return True
+        
+        if msg["type"] == "analysis":
+            # A análise pode levar segundos: resolve uma cópia da posição, fora da trava
+            with game_data["lock"]:
+                player = self.find_player(game_id, client_socket)
+                game = self.snapshot_game(game_data)
+            analysis_msg = self.analyze_game(game)
+            client_socket.sendall(self.encode_message(analysis_msg, player["protocol_version"]))
+            return True
+        
+        with game_data["lock"]:
+            if game_data["closed"]:
+                return False
+            
+            if msg["type"] == "move":
+                moved = self.handle_move(game_id, client_socket, msg)
+                if game_data["closed"]:
+                    return False  # A jogada encerrou o jogo
+            
+            elif msg["type"] == "chat":
+                self.handle_chat(game_id, client_socket, msg)
+            
+            elif msg["type"] == "state":
+                # Retrato do tabuleiro (bitboards), 18 bytes no protocolo binário
+                player = self.find_player(game_id, client_socket)
+                state_msg = {
+                    "type": "state",
+                    "black": game_data["game"].black,
+                    "white": game_data["game"].white,
+                    "current_turn": game_data["current_turn"]
+                }
+                client_socket.sendall(self.encode_message(state_msg, player["protocol_version"]))
+        
+        # Como a análise, a busca do computador roda fora da trava
+        if msg["type"] == "move" and moved:
+            return self.play_bot_turns(game_id)
+        return True
+    
+    def snapshot_game(self, game_data):
+        game = game_data["game"]
+        return OthelloGame.from_bitboards(game.black, game.white, game.turn)
+    
+    def find_player(self, game_id, client_socket):
+        return next(p for p in self.games[game_id]["players"] if p["socket"] == client_socket)
+    
+    # Jogada recebida de um cliente; ignorada se não for a vez dele.
+    # Retorna False quando o jogo termina
+    # Retorna True se a jogada foi aplicada; fora da vez ou inválida, é ignorada
+    def handle_move(self, game_id, client_socket, msg):
+        game_data = self.games[game_id]
+        player = self.find_player(game_id, client_socket)
+        row, col = msg["row"], msg["col"]
+        if player["color"] != game_data["current_turn"]:
+            return False
+        if not game_data["game"].is_valid_move(row, col, player["color"]):
+            return False
+        self.process_move(game_id, player, row, col)
+        return True
+    
+    def handle_chat(self, game_id, client_socket, msg):
+        player = self.find_player(game_id, client_socket)
+        chat_msg = {
+            "type": "chat",
+            "color": player["color"],
+            "player_name": msg["player_name"],
+            "message": msg["message"]
+        }
+        self.record(game_id, "chat", n=msg["player_name"], p=player["color"],
+                    m=msg["message"], ts=time.time())
+        self.broadcast_to_game(game_id, chat_msg)
+    
+    # Aplica a jogada do jogador; retorna False quando o jogo termina
+    def process_move(self, game_id, player, row, col):
+        game_data = self.games[game_id]
+        game = game_data["game"]
+        
+        if not game.is_valid_move(row, col, player["color"]):
+            return True
+        
+        # Faz o movimento
+        game.make_move(row, col, player["color"])
+        next_color = -player["color"]
+        game_data["last_activity"] = time.monotonic()
+        
+        # Atualiza a vez antes de avisar os clientes: o adversário pode responder
+        # assim que receber a jogada
+        game_over = False
+        no_valid_moves = False
+        if not game.has_moves(next_color):
+            # Verifica se o jogador atual ainda tem movimentos
+            if game.has_moves(player["color"]):
+                next_color = player["color"]  # Mantém o mesmo jogador
+                no_valid_moves = True
+            else:
+                # Fim do jogo - nenhum jogador pode mover
+                game_over = True
+        if not game_over:
+            game_data["current_turn"] = next_color
+        # O diário guarda o tabuleiro resultante: a recuperação não refaz jogadas
+        self.record(game_id, "move", p=player["color"], r=row, c=col, b=game.black,
+                    w=game.white, t=None if game_over else next_color)
+        
+        # Envia o movimento para todos
+        move_msg = {
+            "type": "move",
+            "row": row,
+            "col": col,
+            "color": player["color"],
+            "next_turn": -player["color"]
+        }
+        self.broadcast_to_game(game_id, move_msg)
+        
+        if no_valid_moves:
+            # Envia mensagem informando que não há movimentos válidos
+            no_moves_msg = {
+                "type": "move",
+                "row": row,
+                "col": col,
+                "color": player["color"],
+                "next_turn": next_color,
+                "no_valid_moves": True
+            }
+            self.broadcast_to_game(game_id, no_moves_msg)
+        elif game_over:
+            if self.game_over_delay:
+                time.sleep(self.game_over_delay)
+            self.handle_game_over(game_id)
+            return False
+        
+        ## Envia mensagem do sistema informando o próximo jogador
+        #next_player = next(p for p in game_data["players"] if p["color"] == next_color)
+        #system_msg = {
+        #    "type": "chat",
+        #    "color": "system",
+        #    "player_name": "Sistema",
+        #    "message": f"Vez do jogador {next_player['name']} (Peças {'Pretas' if next_color == 'black' else 'Brancas'})"
+        #}
+        #self.broadcast_to_game(game_id, system_msg)
+        return True
+    
+    # Joga pelo computador enquanto for a vez dele; retorna False quando o jogo termina.
+    # Chamado sem a trava: a busca usa uma cópia da posição e a jogada só é
+    # aplicada se, ao retomar a trava, o jogo continua na mesma posição
+    def play_bot_turns(self, game_id):
+        game_data = self.games.get(game_id)
+        if not game_data or not self.claim_bot(game_data):
+            return bool(game_data) and not game_data["closed"]
+        try:
+            while True:
+                with game_data["lock"]:
+                    if game_data["closed"]:
+                        return False
+                    bot = self.bot_to_move(game_data)
+                    if bot is None:
+                        game_data["bot_thinking"] = False
+                        return True
+                    game = self.snapshot_game(game_data)
+                
+                move = bot["engine"].choose_move(game, bot["color"])
+                with game_data["lock"]:
+                    if game_data["closed"]:
+                        return False
+                    if not self.same_position(game_data, game, bot["color"]):
+                        continue  # O jogo mudou enquanto o computador pensava
+                    if move is None or not self.process_move(game_id, bot, *move):
+                        return False
+        except BaseException:
+            self.release_bot(game_data)
+            raise
+    
+    # Uma busca por jogo: o motor do computador guarda estado da busca. Se já
+    # há uma em andamento, ela mesma confere de novo a vez ao terminar
+    def claim_bot(self, game_data):
+        with game_data["lock"]:
+            if game_data.get("bot_thinking") or game_data["closed"]:
+                return False
+            game_data["bot_thinking"] = True
+            return True
+    
+    def release_bot(self, game_data):
+        with game_data["lock"]:
+            game_data["bot_thinking"] = False
+    
+    # O jogo ainda está na posição copiada, com a vez de `color`
+    def same_position(self, game_data, game, color):
+        current = game_data["game"]
+        return (game_data["current_turn"] == color and
+                current.black == game.black and current.white == game.white)
+    
+    def bot_to_move(self, game_data):
+        return next((p for p in game_data["players"]
+                     if p.get("engine") and p["color"] == game_data["current_turn"]), None)
+    
+    # Resolve a posição de forma exata (apenas perto do fim do jogo)
+    def analyze_game(self, game):
+        solver = EndgameSolver(max_empties=self.analysis_max_empties,
+                               time_limit=self.analysis_time_limit)
+        try:
+            result = solver.solve(game)
+        except ValueError as e:
+            return {"type": "analysis", "status": "error", "message": str(e)}
+        except SolverTimeout:
+            return {"type": "analysis", "status": "error", "message": "Tempo de análise esgotado"}
+        
+        black_minus_white = result["score"] if result["color"] == BLACK else -result["score"]
+        return {
+            "type": "analysis",
+            "status": "success",
+            "color": result["color"] if game.turn is not None else None,
+            "score": result["score"],
+            "black_minus_white": black_minus_white,
+            "best_move": list(result["best_move"]) if result["best_move"] else None,
+            "empties": result["empties"],
+            "nodes": result["nodes"]
+        }
+    
+    # Serializa a mensagem, trocando os códigos de cor pelos nomes do protocolo
+    def encode_message(self, msg, version=PROTOCOL_VERSION):
+        wire_msg = dict(msg)
+        for field in COLOR_FIELDS:
+            if field in wire_msg:
+                wire_msg[field] = color_name(wire_msg[field])
+        return protocol.encode_message(wire_msg, version)
+    
     def broadcast_to_game(self, game_id, msg):
         game_data = self.games[game_id]
+        # Serializa uma vez por versão do protocolo
+        encoded = {}
         for player in game_data["players"]:
+            if player["socket"] is None:
+                continue
+            version = player["protocol_version"]
+            if version not in encoded:
+                encoded[version] = self.encode_message(msg, version)
             try:
-                player["socket"].send(json.dumps(msg).encode())
+                player["socket"].sendall(encoded[version])
             except Exception as e:
                 print(f"Erro ao enviar mensagem para jogador: {e}")
                 self.remove_client(player["socket"])
+        
+        spectators = game_data["spectators"]
+        if spectators:
+            for spectator in spectators:
+                version = spectator["protocol_version"]
+                if version not in encoded:
+                    encoded[version] = self.encode_message(msg, version)
+            self.deliver_to_spectators(list(spectators), encoded)
+    
+    # Os mesmos bytes já codificados para os jogadores são entregues aos
+    # espectadores por outra thread, sem atrasar quem jogou.
+    # encoded=None fecha as conexões depois de enviar o que estiver pendente
+    def deliver_to_spectators(self, spectators, encoded):
+        if encoded is None:
+            for spectator in spectators:
+                spectator["socket"].close(flush=True)
+        else:
+            self.spectator_hub.publish(spectators, encoded)
+    
+    def fan_out(self, spectators, encoded):
+        for spectator in spectators:
+            try:
+                if encoded is None:
+                    spectator["socket"].close(flush=True)
+                else:
+                    spectator["socket"].sendall(encoded[spectator["protocol_version"]])
+            except Exception:
+                self.remove_client(spectator["socket"])
     
     def broadcast_game_start(self, game_id):
         game_data = self.games[game_id]
         msg = {
             "type": "game_start",
-            "current_turn": "black"
+            "current_turn": BLACK
         }
         self.broadcast_to_game(game_id, msg)
     
+    # O índice conexão -> jogo evita percorrer todos os jogos a cada desconexão
     def remove_client(self, client_socket):
-        for game_id, game_data in self.games.items():
-            for player in game_data["players"]:
-                if player["socket"] == client_socket:
-                    self.log(f"Jogador '{player['name']}' desconectou-se do servidor")
-            game_data["players"] = [p for p in game_data["players"] if p["socket"] != client_socket]
+        if not self.running:
+            # Quem cai com o servidor não sai do jogo e retoma o lugar depois do reinício
+            try:
+                client_socket.close()
+            except:
+                pass
+            return
+        game_id = self.games.unbind(client_socket)
+        game_data = self.games.get(game_id) if game_id is not None else None
+        if game_data is not None:
+            with game_data["lock"]:
+                for player in game_data["players"]:
+                    if player["socket"] == client_socket:
+                        self.log(f"Jogador '{player['name']}' desconectou-se do servidor")
+                        self.record(game_id, "leave", n=player["name"])
+                game_data["players"] = [p for p in game_data["players"] if p["socket"] != client_socket]
+                game_data["spectators"] = [s for s in game_data["spectators"] if s["socket"] != client_socket]
+                # Jogos em que só restou o computador são descartados
+                if game_data["players"] and all(p.get("engine") for p in game_data["players"]):
+                    if game_data["spectators"]:
+                        self.deliver_to_spectators(list(game_data["spectators"]), None)
+                    self.close_game(game_id, game_data)
+                # Quem esperava adversário no lobby desistiu: o jogo vazio é descartado
+                elif not game_data["players"] and self.lobby.cancel(game_id):
+                    self.close_game(game_id, game_data)
+                # Jogo do lobby já pareado que perdeu um jogador: ninguém mais chega
+                # nele, então quem ficou é avisado e o jogo é encerrado. Quem foi
+                # pareado e ainda não entrou cai em um jogo novo, que volta para a fila
+                elif self.lobby.owns(game_id) and not self.lobby.is_waiting(game_id):
+                    self.broadcast_to_game(game_id, {"type": "error", "message": "O adversário saiu da partida"})
+                    for player in game_data["players"]:
+                        if player["socket"] is not None:
+                            player["socket"].close(flush=True)
+                    if game_data["spectators"]:
+                        self.deliver_to_spectators(list(game_data["spectators"]), None)
+                    self.close_game(game_id, game_data)
         try:
             client_socket.close()
         except:
             pass
     
+    # Tira o jogo do registro; chamado com a trava do jogo adquirida.
+    # Quem ainda esperava pela trava vê "closed" e desiste do jogo
+    def close_game(self, game_id, game_data):
+        game_data["closed"] = True
+        self.record(game_id, "close")
+        for participant in game_data["players"] + game_data["spectators"]:
+            if participant["socket"] is not None:
+                self.games.unbind(participant["socket"])
+        self.games.remove(game_id)
+    
+    def reap_loop(self):
+        while self.running:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception as e:
+                self.log(f"Erro no coletor de jogos: {e}", "ERROR")
+    
+    # Descarta jogos abandonados: vazios há mais que idle_timeout ou sem
+    # jogadas há mais que game_idle_timeout. Quem ainda estiver conectado a
+    # um jogo parado é avisado e desconectado
+    def reap(self):
+        now = time.monotonic()
+        games = 0
+        connections = 0
+        for game_id, game_data in self.games.items():
+            with game_data["lock"]:
+                if game_data["closed"]:
+                    continue
+                idle = now - game_data["last_activity"]
+                empty = not any(p["socket"] for p in game_data["players"]) and not game_data["spectators"]
+                if not (empty and idle > self.idle_timeout) and idle <= self.game_idle_timeout:
+                    continue
+                
+                self.broadcast_to_game(game_id, {"type": "error", "message": "Jogo encerrado por inatividade"})
+                for player in game_data["players"]:
+                    if player["socket"] is not None:
+                        player["socket"].close(flush=True)
+                        connections += 1
+                if game_data["spectators"]:
+                    connections += len(game_data["spectators"])
+                    self.deliver_to_spectators(list(game_data["spectators"]), None)
+                self.lobby.cancel(game_id)
+                self.close_game(game_id, game_data)
+                games += 1
+        
+        if games:
+            self.count_reclaimed("games", games)
+            self.count_reclaimed("connections", connections)
+            self.log(f"Coletor: {games} jogo(s) abandonado(s) e {connections} conexão(ões) encerrados")
+        return games
+    
     def handle_game_over(self, game_id):
         game_data = self.games[game_id]
         game = game_data["game"]
         
         # Conta as peças usando o estado do jogo no servidor
-        black_count = 0
-        white_count = 0
-        for row in range(game.board_size):
-            for col in range(game.board_size):
-                if game.board[row][col] == "black":
-                    black_count += 1
-                elif game.board[row][col] == "white":
-                    white_count += 1
+        black_count, white_count = game.get_score()
         
         # Determina o vencedor
         if black_count > white_count:
@@ -249,15 +1149,22 @@ class OthelloServer:
             "white_count": white_count
         }
         self.broadcast_to_game(game_id, game_over_msg)
+        if game_data["spectators"]:
+            self.deliver_to_spectators(list(game_data["spectators"]), None)
         
         # Remove o jogo da lista de jogos ativos
-        del self.games[game_id]
+        self.close_game(game_id, game_data)
 
     def stop(self):
         self.running = False
-        self.server.close()
-        for game_id, game_data in self.games.items():
-            for player in game_data["players"]:
+        if self.server is not None:
+            self.server.close()
+        # Antes de fechar as conexões: quem cai com o servidor não "sai" do jogo
+        # e pode retomar a partida depois do reinício
+        if self.journal is not None:
+            self.journal.close()
+        for game_data in self.games.values():
+            for player in game_data["players"] + game_data["spectators"]:
                 try:
                     player["socket"].close()
                 except:
@@ -265,5 +1172,5 @@ class OthelloServer:
         self.log("Servidor encerrado")
 
 if __name__ == "__main__":
-    server = OthelloServer()
+    server = OthelloServer(journal_dir=JOURNAL_DIR)
     server.start()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from server import OthelloServer
+from journal import JOURNAL_DIR
 import threading
 import datetime
 
@@ -65,7 +66,7 @@ class ServerGUI:
 
     def start_server(self):
         try:
-            self.server = OthelloServer(log_callback=self.log_message)
+            self.server = OthelloServer(log_callback=self.log_message, journal_dir=JOURNAL_DIR)
             # Atualiza o label com o IP
             self.ip_label.configure(
                 text=f"IP para conexão: {self.server.network_ip} | Porta: {self.server.port}"
@@ -0,0 +1,512 @@
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import selectors
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+
+from server import OthelloServer, QUERY_TYPES, IDLE_TIMEOUT, MAX_LIST_LIMIT
+from async_server import AsyncOthelloServer
+from lobby import Lobby, DEFAULT_BUCKET_SIZE
+from journal import JOURNAL_DIR
+from protocol import (MessageStream, ProtocolError, LEGACY_VERSION, FRAMED_VERSION, RECV_SIZE,
+                      encode_message, negotiate_version)
+
+SERVER_CLASSES = {"thread": OthelloServer, "async": AsyncOthelloServer}
+
+# Pacotes entre supervisor e workers: cabeçalho JSON, "\n" e os bytes que o
+# supervisor já leu do cliente (no máximo um quadro e o que veio junto)
+CONTROL_PACKET_SIZE = 128 * 1024
+# Espera pela resposta de um worker a uma consulta
+QUERY_TIMEOUT = 2.0
+# Intervalo entre as verificações dos workers e das conexões ainda sem mensagem
+CHECK_INTERVAL = 1.0
+
+# Partidas contra o computador ganham o sufixo -botN no worker; o roteamento
+# usa o id original para os espectadores chegarem ao mesmo worker
+BOT_SUFFIX = re.compile(r"-bot\d+$")
+
+
+def worker_index(game_id, workers):
+    key = BOT_SUFFIX.sub("", str(game_id))
+    return zlib.crc32(key.encode()) % workers
+
+
+# Lobby do lado do worker. O pareamento acontece no supervisor, que repassa a
+# conexão já com o game_id; aqui só ficam os jogos que esperam adversário, para
+# que a desistência (desconexão, coletor) libere a vaga também no supervisor
+class WorkerLobby:
+    def __init__(self, control, prefix="match"):
+        self.control = control
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.waiting = set()
+
+    def hold(self, game_id):
+        with self.lock:
+            self.waiting.add(game_id)
+
+    def release(self, game_id):
+        with self.lock:
+            self.waiting.discard(game_id)
+
+    def cancel(self, game_id):
+        with self.lock:
+            if game_id not in self.waiting:
+                return False
+            self.waiting.discard(game_id)
+            try:
+                self.control.send(json.dumps({"type": "cancel", "game_id": game_id}).encode())
+            except OSError:
+                pass  # Supervisor encerrado: não há mais fila para liberar
+        return True
+
+    # O supervisor já escolheu o jogo e o trocou na mensagem
+    def place(self, msg):
+        return msg["game_id"]
+
+    def requeue(self, game_id, rating=None):
+        with self.lock:
+            if game_id in self.waiting:
+                return
+            self.waiting.add(game_id)
+            try:
+                self.control.send(json.dumps({"type": "requeue", "game_id": game_id,
+                                              "rating": rating}).encode())
+            except OSError:
+                pass
+
+    def owns(self, game_id):
+        return re.fullmatch(re.escape(self.prefix) + r"\d+", str(game_id)) is not None
+
+    def is_waiting(self, game_id):
+        return game_id in self.waiting
+
+    def __len__(self):
+        return len(self.waiting)
+
+
+# Ponto de entrada do processo worker: um OthelloServer (ou AsyncOthelloServer)
+# sem socket de escuta, que atende as conexões recebidas pelo canal de controle
+def run_worker(index, control, queries, mode, options):
+    options.setdefault("log_callback", lambda message, kind: print(f"[{kind}] worker {index}: {message}"))
+    server = SERVER_CLASSES[mode](listen=False, **options)
+    # O lobby próprio do servidor já foi ajustado pela recuperação do diário: o
+    # supervisor continua a numeração dos jogos de pareamento a partir dele
+    last_match = next(server.lobby.counter) - 1
+    control.send(json.dumps({"type": "ready", "last_match": last_match}).encode())
+    server.lobby = WorkerLobby(control, server.lobby.prefix)
+    threading.Thread(target=answer_queries, args=(server, queries), daemon=True).start()
+    if mode == "async":
+        asyncio.run(serve_async_worker(server, control))
+    else:
+        serve_worker(server, control)
+
+
+def answer_queries(server, queries):
+    while True:
+        packet = queries.recv(CONTROL_PACKET_SIZE)
+        if not packet:
+            break
+        query = json.loads(packet)
+        try:
+            response = server.handle_query(query["msg"])
+        except Exception as e:
+            response = {"type": "error", "message": str(e)}
+        queries.send(json.dumps({"id": query["id"], "response": response}).encode())
+
+
+# Conexão repassada: socket, endereço do cliente e as mensagens já lidas pelo supervisor.
+# None quando o supervisor fecha o canal
+def receive_handoff(server, control):
+    packet, fds, _, _ = socket.recv_fds(control, CONTROL_PACKET_SIZE, 1)
+    if not packet:
+        return None
+    header, data = packet.split(b"\n", 1)
+    header = json.loads(header)
+    client_socket = socket.socket(fileno=fds[0])
+
+    stream = MessageStream()
+    messages = stream.feed(data)
+    if "game_id" in header:
+        # Jogo escolhido pelo lobby do supervisor; "matchmaking" fica na mensagem
+        # para o worker saber que o jogo veio do lobby
+        messages[0]["game_id"] = header["game_id"]
+        if header["lobby"] == "waiting":
+            server.lobby.hold(header["game_id"])
+        else:
+            server.lobby.release(header["game_id"])
+    return client_socket, tuple(header["address"]), stream, messages
+
+
+def serve_worker(server, control):
+    if server.reap_interval:
+        threading.Thread(target=server.reap_loop, daemon=True).start()
+    while server.running:
+        handoff = receive_handoff(server, control)
+        if handoff is None:
+            break
+        threading.Thread(target=server.handle_client, args=handoff).start()
+    server.stop()
+
+
+async def serve_async_worker(server, control):
+    loop = asyncio.get_running_loop()
+
+    def on_handoff():
+        handoff = receive_handoff(server, control)
+        if handoff is None:
+            loop.remove_reader(control.fileno())
+            server.stop()
+            return
+        server.spawn(adopt_connection(server, *handoff))
+
+    # As chamadas de on_handoff só começam quando serve() já está esperando
+    loop.add_reader(control.fileno(), on_handoff)
+    await server.serve()
+
+
+async def adopt_connection(server, client_socket, address, stream, messages):
+    reader, writer = await asyncio.open_connection(sock=client_socket)
+    await server.handle_connection(reader, writer, stream, messages)
+
+
+# Conexão aceita pelo supervisor que ainda não enviou a primeira mensagem
+class PendingConnection:
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.stream = MessageStream()
+        self.data = bytearray()
+        self.accepted_at = time.monotonic()
+
+
+class WorkerProcess:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.control = None  # Conexões repassadas (->) e desistências do lobby (<-)
+        self.queries = None  # Consultas e respostas, uma por vez
+        self.query_lock = threading.Lock()
+
+
+# Supervisor de vários processos servidores. Um único processo Python fica
+# limitado pelo GIL; aqui o supervisor aceita as conexões, lê a primeira
+# mensagem e repassa o socket (SCM_RIGHTS) ao worker dono do jogo, escolhido
+# pelo crc32 do game_id: os dois jogadores e os espectadores de uma partida
+# sempre caem no mesmo worker. SO_REUSEPORT não serviria, porque o kernel
+# distribui as conexões sem saber o jogo.
+#
+# O lobby fica no supervisor, que já repassa a conexão com o jogo escolhido.
+# Consultas (list_games, server_stats) são respondidas juntando as respostas
+# de todos os workers. Workers que terminam são reiniciados; com journal_dir
+# cada worker tem o seu diário e recupera as partidas ao reiniciar
+class Supervisor:
+    def __init__(self, host='0.0.0.0', port=5000, workers=None, mode="thread", log_callback=None,
+                 backlog=1024, rating_bucket_size=DEFAULT_BUCKET_SIZE, idle_timeout=IDLE_TIMEOUT,
+                 journal_dir=None, **server_options):
+        if mode not in SERVER_CLASSES:
+            raise ValueError(f"Modo deve ser um de {tuple(SERVER_CLASSES)}")
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.log_callback = log_callback
+        self.running = True
+        self.idle_timeout = idle_timeout
+        self.journal_dir = journal_dir
+        self.server_options = dict(server_options, rating_bucket_size=rating_bucket_size,
+                                   idle_timeout=idle_timeout)
+        # Workers sem herdar os sockets do supervisor: só os canais passados a cada um
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = [WorkerProcess(index) for index in range(workers or os.cpu_count())]
+        self.restarts = 0
+        self.lobby = Lobby(rating_bucket_size)
+        self.pending = {}
+        self.query_ids = itertools.count(1)
+
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(backlog)
+        self.server.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+
+    def log(self, message, message_type="INFO"):
+        if self.log_callback:
+            self.log_callback(message, message_type)
+        else:
+            print(f"[{message_type}] {message}")
+
+    def spawn(self, worker):
+        control, worker_control = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        queries, worker_queries = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        options = dict(self.server_options)
+        if self.journal_dir:
+            options["journal_dir"] = os.path.join(self.journal_dir, f"worker{worker.index}")
+        worker.process = self.context.Process(
+            target=run_worker, args=(worker.index, worker_control, worker_queries, self.mode, options),
+            daemon=True)
+        worker.process.start()
+        worker_control.close()
+        worker_queries.close()
+        worker.control = control
+        worker.queries = queries
+        self.selector.register(control, selectors.EVENT_READ, worker)
+        self.log(f"Worker {worker.index} iniciado (pid {worker.process.pid})")
+
+    def start(self):
+        for worker in self.workers:
+            self.spawn(worker)
+        self.wait_ready()
+        self.selector.register(self.server, selectors.EVENT_READ, None)
+        self.log(f"Supervisor com {len(self.workers)} worker(s) em {self.host}:{self.port}")
+
+        last_check = time.monotonic()
+        while self.running:
+            try:
+                events = self.selector.select(CHECK_INTERVAL)
+            except OSError:
+                break
+            for key, _ in events:
+                if key.data is None:
+                    self.accept()
+                elif isinstance(key.data, WorkerProcess):
+                    self.read_control(key.data)
+                else:
+                    self.read_pending(key.data)
+
+            now = time.monotonic()
+            if now - last_check >= CHECK_INTERVAL:
+                last_check = now
+                self.check_workers()
+                self.drop_idle(now)
+
+    # Cada worker avisa quando terminou de recuperar o seu diário, com o maior
+    # número de jogo de pareamento que encontrou. Só então o supervisor aceita
+    # conexões: um "matchN" novo não pode cair em um jogo recuperado
+    def wait_ready(self):
+        last_match = 0
+        for worker in self.workers:
+            try:
+                packet = worker.control.recv(CONTROL_PACKET_SIZE)
+            except OSError:
+                packet = b""
+            if packet:
+                last_match = max(last_match, json.loads(packet)["last_match"])
+        self.lobby.counter = itertools.count(last_match + 1)
+
+    def accept(self):
+        try:
+            client_socket, address = self.server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            if self.running:
+                self.log("Erro ao aceitar conexão", "ERROR")
+            return
+        client_socket.setblocking(False)
+        pending = PendingConnection(client_socket, address)
+        self.pending[client_socket] = pending
+        self.selector.register(client_socket, selectors.EVENT_READ, pending)
+
+    def read_pending(self, pending):
+        try:
+            data = pending.sock.recv(RECV_SIZE)
+            if not data:
+                self.drop(pending)
+                return
+            pending.data += data
+            messages = pending.stream.feed(data)
+        except BlockingIOError:
+            return
+        except (OSError, ProtocolError, ValueError):
+            self.drop(pending)
+            return
+        if not messages:
+            return
+
+        self.selector.unregister(pending.sock)
+        del self.pending[pending.sock]
+        msg = messages[0]
+        if msg.get("type") in QUERY_TYPES:
+            threading.Thread(target=self.answer_query, args=(pending, msg), daemon=True).start()
+            return
+
+        header = {"address": list(pending.address)[:2]}
+        game_id = msg.get("game_id", "game1")
+        if msg.get("type") == "connect" and msg.get("matchmaking") and not msg.get("vs_bot"):
+            game_id, paired = self.lobby.assign(msg.get("rating"))
+            header.update(game_id=game_id, lobby="paired" if paired else "waiting")
+        self.hand_off(self.workers[worker_index(game_id, len(self.workers))], pending, header)
+
+    # O worker recebe uma cópia do descritor; a do supervisor é fechada em seguida
+    def hand_off(self, worker, pending, header):
+        pending.sock.setblocking(True)
+        packet = json.dumps(header).encode() + b"\n" + bytes(pending.data)
+        try:
+            socket.send_fds(worker.control, [packet], [pending.sock.fileno()])
+        except OSError as e:
+            self.log(f"Erro ao repassar conexão ao worker {worker.index}: {e}", "ERROR")
+            if header.get("lobby") == "waiting":
+                self.lobby.cancel(header["game_id"])
+        pending.sock.close()
+
+    def drop(self, pending):
+        self.selector.unregister(pending.sock)
+        del self.pending[pending.sock]
+        pending.sock.close()
+
+    def drop_idle(self, now):
+        for pending in list(self.pending.values()):
+            if now - pending.accepted_at > self.idle_timeout:
+                self.drop(pending)
+
+    def read_control(self, worker):
+        try:
+            packet = worker.control.recv(CONTROL_PACKET_SIZE)
+        except OSError:
+            packet = b""
+        if not packet:
+            # Canal fechado: o worker terminou
+            self.restart(worker)
+            return
+        msg = json.loads(packet)
+        # O "ready" de um worker reiniciado não muda nada: a numeração do lobby
+        # já passou de todos os jogos que o diário dele pode ter
+        if msg["type"] == "cancel":
+            self.lobby.cancel(msg["game_id"])
+        elif msg["type"] == "requeue":
+            self.lobby.requeue(msg["game_id"], msg.get("rating"))
+
+    def check_workers(self):
+        for worker in self.workers:
+            if not worker.process.is_alive():
+                self.restart(worker)
+
+    def restart(self, worker):
+        if not self.running:
+            return
+        worker.process.join(1)
+        self.log(f"Worker {worker.index} terminou (código {worker.process.exitcode}); reiniciando", "ERROR")
+        self.selector.unregister(worker.control)
+        worker.control.close()
+        with worker.query_lock:
+            worker.queries.close()
+        # Quem esperava adversário em um jogo desse worker perdeu a partida
+        for game_id in list(self.lobby.bucket_of):
+            if worker_index(game_id, len(self.workers)) == worker.index:
+                self.lobby.cancel(game_id)
+        self.restarts += 1
+        self.spawn(worker)
+
+    # Consulta avulsa: cada worker responde pelos seus jogos
+    def answer_query(self, pending, msg):
+        version = negotiate_version(msg)
+        if pending.stream.version != LEGACY_VERSION:
+            version = max(version, FRAMED_VERSION)
+        try:
+            if msg["type"] == "server_stats":
+                response = self.server_stats()
+            else:
+                response = self.list_games(msg)
+            pending.sock.setblocking(True)
+            pending.sock.sendall(encode_message(response, version))
+        except Exception as e:
+            self.log(f"Erro ao responder consulta: {e}", "ERROR")
+        finally:
+            pending.sock.close()
+
+    # Resposta do worker ou None se ele não responder a tempo
+    def ask(self, worker, msg):
+        query_id = next(self.query_ids)
+        with worker.query_lock:
+            queries = worker.queries
+            try:
+                queries.settimeout(QUERY_TIMEOUT)
+                queries.send(json.dumps({"id": query_id, "msg": msg}).encode())
+                while True:
+                    reply = json.loads(queries.recv(CONTROL_PACKET_SIZE))
+                    # Respostas atrasadas de consultas que já desistiram são descartadas
+                    if reply["id"] == query_id:
+                        return reply["response"]
+            except (OSError, ValueError):
+                return None
+
+    def server_stats(self):
+        totals = Counter()
+        reclaimed = Counter()
+        alive = 0
+        for worker in self.workers:
+            stats = self.ask(worker, {"type": "server_stats"})
+            if stats is None:
+                continue
+            alive += 1
+            totals["games"] += stats["games"]
+            totals["threads"] += stats["threads"]
+            reclaimed.update(stats["reclaimed"])
+        return {
+            "type": "server_stats",
+            "games": totals["games"],
+            "lobby_waiting": len(self.lobby),
+            "threads": totals["threads"],
+            "reclaimed": dict(reclaimed),
+            "workers": len(self.workers),
+            "workers_alive": alive,
+            "restarts": self.restarts,
+            "pending_connections": len(self.pending)
+        }
+
+    # Os jogos são listados worker a worker: primeiro os totais de cada um,
+    # depois só as páginas que cobrem o intervalo pedido
+    def list_games(self, msg):
+        offset = max(0, int(msg.get("offset", 0)))
+        limit = min(max(1, int(msg.get("limit", 20))), MAX_LIST_LIMIT)
+        totals = []
+        for worker in self.workers:
+            reply = self.ask(worker, {"type": "list_games", "limit": 1})
+            totals.append(reply["total"] if reply else 0)
+
+        games = []
+        start = 0
+        for worker, total in zip(self.workers, totals):
+            if len(games) < limit and offset < start + total:
+                reply = self.ask(worker, {"type": "list_games", "offset": max(0, offset - start),
+                                          "limit": limit - len(games)})
+                if reply:
+                    games.extend(reply["games"])
+            start += total
+        return {
+            "type": "games",
+            "games": games,
+            "offset": offset,
+            "limit": limit,
+            "total": sum(totals)
+        }
+
+    # Fechar o canal de controle faz o worker encerrar o servidor (e o diário) normalmente
+    def stop(self):
+        self.running = False
+        self.selector.close()
+        self.server.close()
+        for pending in self.pending.values():
+            pending.sock.close()
+        for worker in self.workers:
+            if worker.control is not None:
+                worker.control.close()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(2)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        self.log("Supervisor encerrado")
+
+
+if __name__ == "__main__":
+    supervisor = Supervisor(journal_dir=JOURNAL_DIR)
+    supervisor.start()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from game_logic import OthelloGame, flips_mask, color_name, BLACK, WHITE
+from engine import OthelloEngine
+
+
+class RandomPlayer:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game, color):
+        moves = game.get_valid_moves(color)
+        return self.rng.choice(moves) if moves else None
+
+
+class GreedyPlayer:
+    # Joga onde vira mais peças; empates decididos ao acaso
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game, color):
+        own, opp = (game.black, game.white) if color == BLACK else (game.white, game.black)
+        best_moves = []
+        best_count = 0
+        for row, col in game.get_valid_moves(color):
+            count = flips_mask(own, opp, row * 8 + col).bit_count()
+            if count > best_count:
+                best_moves, best_count = [(row, col)], count
+            elif count == best_count:
+                best_moves.append((row, col))
+        return self.rng.choice(best_moves) if best_moves else None
+
+
+def create_engine(seed, arg):
+    # arg: tempo por jogada em segundos
+    return OthelloEngine(time_limit=float(arg) if arg else 0.1)
+
+
+# Tipos de jogador aceitos na linha de comando, no formato "tipo" ou "tipo:argumento"
+PLAYER_TYPES = {
+    "random": lambda seed, arg: RandomPlayer(seed),
+    "greedy": lambda seed, arg: GreedyPlayer(seed),
+    "engine": create_engine,
+}
+
+
+def create_player(spec, seed):
+    kind, _, arg = spec.partition(":")
+    if kind not in PLAYER_TYPES:
+        raise ValueError(f"Tipo de jogador desconhecido: {kind} (opções: {', '.join(PLAYER_TYPES)})")
+    return PLAYER_TYPES[kind](seed, arg)
+
+
+def square_name(row, col):
+    return f"{chr(ord('a') + col)}{row + 1}"
+
+
+# Joga uma partida completa; executado nos processos do pool
+def play_game(task):
+    index, black_spec, white_spec, seed = task
+    specs = {BLACK: black_spec, WHITE: white_spec}
+    players = {
+        BLACK: create_player(black_spec, seed * 2),
+        WHITE: create_player(white_spec, seed * 2 + 1),
+    }
+    game = OthelloGame()
+    moves = []
+    move_times = {BLACK: [], WHITE: []}
+    start = time.perf_counter()
+
+    while game.turn is not None:
+        color = game.turn
+        move_start = time.perf_counter()
+        move = players[color].choose_move(game, color)
+        move_times[color].append(time.perf_counter() - move_start)
+        if move is None or not game.make_move(move[0], move[1], color):
+            raise RuntimeError(f"Jogador {color_name(color)} ({specs[color]}) escolheu jogada inválida: {move}")
+        moves.append(square_name(*move))
+
+    black_count, white_count = game.get_score()
+    if black_count > white_count:
+        winner = "black"
+    elif white_count > black_count:
+        winner = "white"
+    else:
+        winner = None
+    return {
+        "game": index,
+        "seed": seed,
+        "black": black_spec,
+        "white": white_spec,
+        "moves": "".join(moves),
+        "score": [black_count, white_count],
+        "winner": winner,
+        "move_times": {color_name(color): times for color, times in move_times.items()},
+        "duration": time.perf_counter() - start
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Método do posto mais próximo
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+# Joga `games` partidas entre os dois jogadores, alternando as cores,
+# e grava cada partida como uma linha JSON assim que ela termina
+def run_tournament(player1, player2, games, workers=None, output=None, seed=0):
+    tasks = []
+    for index in range(games):
+        black, white = (player1, player2) if index % 2 == 0 else (player2, player1)
+        tasks.append((index, black, white, seed + index))
+
+    labels = {"player1": player1, "player2": player2}
+    stats = {
+        slot: {"wins": 0, "losses": 0, "draws": 0, "discs": 0, "move_times": []}
+        for slot in labels
+    }
+    out = open(output, "w") if output else None
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for record in pool.imap_unordered(play_game, tasks):
+                if out:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                # Jogos pares: player1 é o preto
+                slot_by_color = (
+                    {"black": "player1", "white": "player2"} if record["game"] % 2 == 0
+                    else {"black": "player2", "white": "player1"}
+                )
+                for color, slot in slot_by_color.items():
+                    entry = stats[slot]
+                    entry["move_times"].extend(record["move_times"][color])
+                    entry["discs"] += record["score"][0 if color == "black" else 1]
+                    if record["winner"] is None:
+                        entry["draws"] += 1
+                    elif record["winner"] == color:
+                        entry["wins"] += 1
+                    else:
+                        entry["losses"] += 1
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "games": games,
+        "seconds": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0.0,
+        "players": {}
+    }
+    for slot, entry in stats.items():
+        times = entry["move_times"]
+        summary["players"][slot] = {
+            "spec": labels[slot],
+            "wins": entry["wins"],
+            "losses": entry["losses"],
+            "draws": entry["draws"],
+            "win_rate": entry["wins"] / games if games else 0.0,
+            "avg_discs": entry["discs"] / games if games else 0.0,
+            "moves": len(times),
+            "move_time_p50": percentile(times, 0.50),
+            "move_time_p90": percentile(times, 0.90),
+            "move_time_p99": percentile(times, 0.99),
+            "move_time_max": max(times) if times else 0.0
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Torneio de Othello entre bots em vários processos")
+    parser.add_argument("player1", help=f"Jogador 1 ({', '.join(PLAYER_TYPES)}; ex.: engine:0.2)")
+    parser.add_argument("player2", help="Jogador 2")
+    parser.add_argument("--games", type=int, default=100, help="Número de partidas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processos no pool")
+    parser.add_argument("--output", default="tournament.jsonl", help="Arquivo JSONL com as partidas")
+    parser.add_argument("--seed", type=int, default=0, help="Semente inicial")
+    args = parser.parse_args(argv)
+
+    for spec in (args.player1, args.player2):
+        try:
+            create_player(spec, 0)
+        except ValueError as e:
+            parser.error(str(e))
+
+    summary = run_tournament(args.player1, args.player2, args.games,
+                             workers=args.workers, output=args.output, seed=args.seed)
+
+    print(f"{summary['games']} partidas em {summary['seconds']:.2f}s "
+          f"({summary['games_per_sec']:.1f} partidas/s, {args.workers} processos)")
+    for slot, data in summary["players"].items():
+        print(f"{slot} ({data['spec']}): {data['wins']}V {data['losses']}D {data['draws']}E "
+              f"- vitórias {data['win_rate']:.1%}, média de {data['avg_discs']:.1f} peças")
+        print(f"    tempo por jogada: p50 {data['move_time_p50'] * 1000:.2f}ms, "
+              f"p90 {data['move_time_p90'] * 1000:.2f}ms, p99 {data['move_time_p99'] * 1000:.2f}ms, "
+              f"máx {data['move_time_max'] * 1000:.2f}ms")
+    print(f"Partidas gravadas em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# Tipos de limite guardados junto com o valor de uma posição
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    def __init__(self, size_bits=18):
+        # Número fixo de entradas (potência de 2); a memória não cresce durante a busca
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        # Entradas de buscas anteriores passam a ser substituídas primeiro
+        self.age += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    # Retorna (profundidade, valor, limite, melhor jogada) ou None
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1], entry[2], entry[3], entry[4]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, bound, move=None):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is not None and entry[0] != key:
+            # Mantém a entrada antiga se ela for da busca atual e mais profunda
+            if entry[5] == self.age and entry[1] > depth:
+                return False
+            self.replacements += 1
+        elif entry is not None and move is None:
+            move = entry[4]
+        self.entries[index] = (key, depth, value, bound, move, self.age)
+        self.stores += 1
+        return True
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self):
+        used = sum(1 for entry in self.entries if entry is not None)
+        return {
+            "size": self.size,
+            "used": used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "stores": self.stores,
+            "replacements": self.replacements
+        }